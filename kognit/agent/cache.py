@@ -0,0 +1,35 @@
+import os
+import time
+from typing import Optional
+from kognit.models.analysis import RepoAnalysis
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "kognit", "analyses")
+CACHE_TTL = 7 * 24 * 60 * 60 # Repo analyses stay valid for a week
+
+def _path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+def get(key: str, ttl: int = CACHE_TTL) -> Optional[RepoAnalysis]:
+    """
+    Returns the cached analysis for `key`, or None on a miss or stale entry.
+    """
+    path = _path(key)
+    try:
+        if time.time() - os.path.getmtime(path) > ttl:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return RepoAnalysis.model_validate_json(f.read())
+    except (OSError, ValueError):
+        # Missing or corrupt entries are just misses
+        return None
+
+def set(key: str, analysis: RepoAnalysis) -> None:
+    """
+    Persists an analysis under `key`. Failures are non-fatal.
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_path(key), "w", encoding="utf-8") as f:
+            f.write(analysis.model_dump_json())
+    except OSError as e:
+        print(f"  > Warning: Could not write analysis cache: {e}")
@@ -1,10 +1,71 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal, Optional, Tuple
 import asyncio
-from pydantic import BaseModel, Field
+import functools
+import hashlib
+import random
+import re
+import httpx
+from operator import attrgetter
 from pydantic_ai import Agent
-from kognit.probes.github import GithubProbe
-from kognit.models.identity import ProjectHighlight
 from kognit.models.analysis import RepoAnalysis
+from kognit.agent import cache
+from kognit.metrics import NullMetrics
+
+# Extracts the raw text a model produced when it refused to call the output tool
+_FAILED_GEN_RE = re.compile(r"'failed_generation':\s*(?:\"|')(.+?)(?:\"|')\}", re.DOTALL)
+# Fallbacks for errors that carry no status code (matched against the lowercased message)
+_TERMINAL_ERROR_RE = re.compile(r"\b(?:401|403|unauthorized|permission denied|invalid api key)\b")
+_TRANSIENT_ERROR_RE = re.compile(r"\b(?:429|503|rate[ _]limit(?:ed)?|too many requests|timed out)\b")
+
+# Longest provider-requested wait honoured before retrying a rate-limited analysis
+RETRY_AFTER_MAX = 60.0
+
+class AbortDive(Exception):
+    """
+    Raised when an analysis fails in a way every remaining repo would too (bad key, exhausted quota).
+    """
+
+def _classify(e: Exception) -> Literal["transient", "terminal", "recoverable"]:
+    """
+    Buckets an analysis error: retry it, abort the whole dive, or fall back for this repo only.
+    """
+    # FallbackModel raises a group once every model failed; judge it by its members
+    sub_errors = getattr(e, 'exceptions', None)
+    if sub_errors:
+        kinds = {_classify(sub) for sub in sub_errors}
+        if kinds == {"terminal"}:
+            return "terminal"
+        return "transient" if "transient" in kinds else "recoverable"
+
+    if isinstance(e, (asyncio.TimeoutError, httpx.TimeoutException)):
+        return "transient"
+    error_str = str(e).lower()
+    # Quota exhaustion arrives as a 429 but won't clear up by retrying
+    if "insufficient_quota" in error_str:
+        return "terminal"
+    status = getattr(e, 'status_code', None)
+    if status is not None:
+        if status in (401, 403):
+            return "terminal"
+        return "transient" if status in (429, 503) else "recoverable"
+    # No status to go on: match whole words only, so e.g. "140300 tokens" isn't read as a 403
+    if _TERMINAL_ERROR_RE.search(error_str):
+        return "terminal"
+    if _TRANSIENT_ERROR_RE.search(error_str):
+        return "transient"
+    return "recoverable"
+
+def _retry_after(e: Exception) -> Optional[float]:
+    """
+    Seconds the provider asked to wait (Retry-After on a 429/503), if any model in the failure said so.
+    """
+    delays = []
+    for err in getattr(e, 'exceptions', None) or (e,):
+        try:
+            delays.append(float((getattr(err, 'headers', None) or {}).get("retry-after")))
+        except (TypeError, ValueError):
+            pass
+    return min(max(delays), RETRY_AFTER_MAX) if delays else None
 
 REPO_ANALYST_PROMPT = """
 You are a Senior Code Auditor. Your task is to analyze a single repository based on its README and metadata.
@@ -16,122 +77,172 @@ Fill the fields:
 - `key_technologies`: List of strings.
 """
 
+ROAST_SUFFIX = """
+**TONE: ROAST MODE 🔥**
+You are a ruthless, cynical senior engineer. Tear this code apart.
+- Mock bad patterns, over-engineering, or lack of tests.
+- If the code is actually good, begrudgingly admit it but find something nitpicky.
+- Be savage but technically accurate.
+"""
+
+HUMOR_TEMPLATE = """
+**TONE: Humorous (Level {humor}/100)**
+Inject wit, sarcasm, and technical jokes into your analysis.
+Level 100 means full-blown stand-up comedy style.
+Current Level: {humor}. Adjust your sarcasm accordingly.
+"""
+
+@functools.lru_cache(maxsize=16)
+def _build_analyst_agent(model_name: str, fallback_models: Tuple[str, ...], prompt: str) -> Agent:
+    """
+    Builds (once per model/prompt combination) the analyst Agent, so long-lived processes reuse it.
+    """
+    model = model_name
+    if fallback_models:
+        # Move on to the next provider immediately when the primary errors out
+        from pydantic_ai.models.fallback import FallbackModel
+        model = FallbackModel(model_name, *fallback_models)
+
+    return Agent(
+        model,
+        output_type=RepoAnalysis,
+        system_prompt=prompt
+    )
+
 class ExplorerAgent:
-    def __init__(self, model_name: str = 'google-gla:gemini-flash-latest', humor: int = 0, is_roast: bool = False, custom_instructions: str = None):
+    def __init__(self, model_name: str = 'google-gla:gemini-flash-latest', humor: int = 0, is_roast: bool = False, custom_instructions: str = None, concurrency: int = 2, use_cache: bool = True, fallback_models: Optional[List[str]] = None, metrics=None):
         self.model_name = model_name
+        self.metrics = metrics or NullMetrics()
+        self.fallback_models = fallback_models or []
+        self.concurrency = max(1, concurrency)
+        self.use_cache = use_cache
         
         # Dynamic Prompt Construction
-        prompt = REPO_ANALYST_PROMPT
-        
         if is_roast:
-            prompt += """
-            **TONE: ROAST MODE 🔥**
-            You are a ruthless, cynical senior engineer. Tear this code apart.
-            - Mock bad patterns, over-engineering, or lack of tests.
-            - If the code is actually good, begrudgingly admit it but find something nitpicky.
-            - Be savage but technically accurate.
-            """
+            tone = ROAST_SUFFIX
         elif humor > 0:
-            prompt += f"""
-            **TONE: Humorous (Level {humor}/100)**
-            Inject wit, sarcasm, and technical jokes into your analysis.
-            Level 100 means full-blown stand-up comedy style.
-            Current Level: {humor}. Adjust your sarcasm accordingly.
-            """
+            tone = HUMOR_TEMPLATE.format(humor=humor)
+        else:
+            tone = ""
+        custom = f"\n\n**ADDITIONAL USER INSTRUCTIONS:**\n{custom_instructions}" if custom_instructions else ""
         
-        if custom_instructions:
-            prompt += f"\n\n**ADDITIONAL USER INSTRUCTIONS:**\n{custom_instructions}"
-            
-        self.analyst_agent = Agent(
-            model_name,
-            output_type=RepoAnalysis,
-            system_prompt=prompt
-        )
+        self.prompt = "".join((REPO_ANALYST_PROMPT, tone, custom))
+        self.analyst_agent = _build_analyst_agent(model_name, tuple(self.fallback_models), self.prompt)
 
     async def analyze_repository(self, repo_data: Dict[str, Any]) -> RepoAnalysis:
         """
         Analyzes a single repository in isolation.
         """
-        readme_text = ""
-        if repo_data.get("readme"):
-            readme_text = repo_data["readme"].get("text", "")[:8000] # Generous limit for single repo
+        # Pull out only the fields the prompt uses, once
+        name = repo_data.get('name')
+        description = repo_data.get('description')
+        readme_text = (repo_data.get("readme") or {}).get("text") or ""
+        readme_text = readme_text[:8000] # Generous limit for single repo
 
         # None-safe data extraction
-        langs_nodes = (repo_data.get('languages') or {}).get('nodes') or []
-        langs_str = ', '.join([n['name'] for n in langs_nodes if n and 'name' in n])
-        
-        history = repo_data.get('defaultBranchRef') or {}
-        if history:
-            history = history.get('target') or {}
-        if history:
-            history = history.get('history') or {}
+        langs_str = ", ".join(n["name"] for n in (repo_data.get('languages') or {}).get('nodes') or () if n and 'name' in n)
         
+        history = ((repo_data.get('defaultBranchRef') or {}).get('target') or {}).get('history') or {}
         commit_nodes = history.get('nodes') or []
-        latest_commits_text = "\n".join([f"- {n.get('message', 'N/A')}" for n in commit_nodes if n])
-        
-        context = f"""
-        Repository: {repo_data.get('name')}
-        Description: {repo_data.get('description')}
-        Languages: {langs_str}
-        Stars: {repo_data.get('stargazerCount')}
-        Total Commits: {history.get('totalCount', 0)}
+        tree_entries = (repo_data.get('tree') or {}).get('entries') or []
+
+        # Flat, unindented lines keep the prompt free of wasted whitespace tokens
+        context = "\n".join([
+            f"Repository: {name}",
+            f"Description: {description}",
+            f"Languages: {langs_str}",
+            f"Stars: {repo_data.get('stargazerCount')}",
+            f"Total Commits: {history.get('totalCount', 0)}",
+            "",
+            "Latest Commits:",
+            "\n".join([f"- {n.get('message', 'N/A')}" for n in commit_nodes if n]),
+            "",
+            "Repository Structure (Root):",
+            ', '.join([f"{e['name']}{'/' if e['type'] == 'tree' else ''}" for e in tree_entries if e]),
+            "",
+            "README Content:",
+            readme_text,
+        ])
         
-        Latest Commits:
-        {latest_commits_text}
+        # Content-addressed cache: unchanged repos skip the LLM entirely on re-runs
+        cache_key = hashlib.sha256(
+            (self.model_name + self.prompt + str(name) + readme_text + str(description) + langs_str).encode()
+        ).hexdigest()
+        if self.use_cache:
+            cached = cache.get(cache_key)
+            self.metrics.incr("cache_hit" if cached else "cache_miss")
+            if cached:
+                return cached
 
-        Repository Structure (Root):
-        {', '.join([f"{e['name']}{'/' if e['type'] == 'tree' else ''}" for e in (repo_data.get('tree') or {}).get('entries') or [] if e])}
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                with self.metrics.timed("llm_call"):
+                    result = await self.analyst_agent.run(context)
+                if self.use_cache:
+                    cache.set(cache_key, result.output)
+                return result.output
+            except Exception as e:
+                kind = _classify(e)
+                if kind == "terminal":
+                    # No point burning N more calls on a broken key or quota
+                    raise AbortDive(str(e)) from e
+                self.metrics.incr(f"llm_error_{kind}")
+                if kind == "transient" and attempt < max_retries - 1:
+                    # Repos are no longer paced by a pause between batches; the provider's Retry-After is the throttle
+                    await asyncio.sleep(_retry_after(e) or 2 ** attempt + random.random())
+                    continue
+                return self._recover_analysis(name, e)
 
-        README Content:
-        {readme_text}
+    def _recover_analysis(self, name: str, e: Exception) -> RepoAnalysis:
+        """
+        Salvages raw model output from a failed run, or returns a placeholder analysis.
         """
+        # Attempt to recover content from failed_generation if model refused tool use
+        # This is common with some models that prefer chatting over function calling
+        error_str = str(e)
+        content = "Analysis failed."
         
+        # Check for failed_generation in the error body (PydanticAI/Groq specific)
         try:
-            result = await self.analyst_agent.run(context)
-            return result.output
-        except Exception as e:
-            # Attempt to recover content from failed_generation if model refused tool use
-            # This is common with some models that prefer chatting over function calling
-            error_str = str(e)
-            content = "Analysis failed."
-            
-            # Check for failed_generation in the error body (PydanticAI/Groq specific)
-            try:
-                if hasattr(e, 'body') and isinstance(e.body, dict):
-                    failed_gen = e.body.get('error', {}).get('failed_generation')
-                    if failed_gen:
-                        content = failed_gen
-                elif "'failed_generation':" in error_str:
-                    # Fallback string parsing if object access fails
-                    import re
-                    match = re.search(r"'failed_generation':\s*(?:\"|')(.+?)(?:\"|')\}", error_str, re.DOTALL)
-                    if match:
-                        content = match.group(1).encode('utf-8').decode('unicode_escape') # Unescape newlines
-            except:
-                pass
-
-            if content != "Analysis failed.":
-                # We successfully recovered the text!
-                return RepoAnalysis(
-                    name=repo_data.get('name', 'Unknown'),
-                    summary="Recovered from raw model output.",
-                    technical_deconstruction=content,
-                    key_technologies=["Inferred"],
-                    complexity_score=5 # Default
-                )
-
-            # Fallback for empty/failed analysis
+            if hasattr(e, 'body') and isinstance(e.body, dict):
+                failed_gen = e.body.get('error', {}).get('failed_generation')
+                if failed_gen:
+                    content = failed_gen
+            elif "'failed_generation':" in error_str:
+                # Fallback string parsing if object access fails
+                match = _FAILED_GEN_RE.search(error_str)
+                if match:
+                    content = match.group(1).encode('utf-8').decode('unicode_escape') # Unescape newlines
+        except:
+            pass
+
+        if content != "Analysis failed.":
+            # We successfully recovered the text!
             return RepoAnalysis(
-                name=repo_data.get('name', 'Unknown'),
-                summary="Analysis failed or skipped.",
-                technical_deconstruction=f"Could not analyze deeply. Error: {str(e)[:500]}...",
-                key_technologies=[],
-                complexity_score=0
+                name=name or 'Unknown',
+                summary="Recovered from raw model output.",
+                technical_deconstruction=content,
+                key_technologies=["Inferred"],
+                complexity_score=5 # Default
             )
 
+        return self._failed_analysis(name, e)
+
+    @staticmethod
+    def _failed_analysis(name: str, e: BaseException) -> RepoAnalysis:
+        # Fallback for empty/failed analysis
+        return RepoAnalysis(
+            name=name or 'Unknown',
+            summary="Analysis failed or skipped.",
+            technical_deconstruction=f"Could not analyze deeply. Error: {str(e)[:500]}...",
+            key_technologies=[],
+            complexity_score=0
+        )
+
     async def full_dive(self, user_data: Dict[str, Any], max_repos: int = 20) -> Dict[str, Any]:
         """
-        Orchestrates the full dive: serial/parallel analysis of all repos.
+        Orchestrates the full dive: bounded-concurrency analysis of all repos.
         """
         repos = user_data.get("repositories", {}).get("nodes", [])
         # Prioritize: Pinned first, then by stars
@@ -142,22 +253,42 @@ class ExplorerAgent:
         
         print(f"  [Explorer] Starting deep analysis of {len(target_repos)} repositories...")
         
-        analyses = []
-        # Run sequentially or chunks to avoid rate limits? 
-        # Parallel is faster but hits rate limits instantly. 
-        # Let's do chunks of 3.
-        
-        chunk_size = 2 # Reduced chunk size for token safety
-        for i in range(0, len(target_repos), chunk_size):
-            chunk = target_repos[i:i+chunk_size]
-            tasks = [self.analyze_repository(repo) for repo in chunk]
-            results = await asyncio.gather(*tasks)
-            analyses.extend(results)
-            print(f"  [Explorer] Analyzed {len(analyses)}/{len(target_repos)}...")
-            
-            # Add a small delay between chunks to allow TPM to recover
-            if i + chunk_size < len(target_repos):
-                await asyncio.sleep(10) 
+        # Keep `concurrency` calls in flight at all times instead of waiting for
+        # whole batches: a slow repo no longer stalls the ones queued behind it.
+        sem = asyncio.Semaphore(self.concurrency)
+        done = 0
+        aborted = False
+
+        async def _bounded(repo):
+            nonlocal done, aborted
+            async with sem:
+                # The aborting task frees its slot before gather() can cancel the queue
+                if aborted:
+                    raise asyncio.CancelledError()
+                try:
+                    with self.metrics.in_flight("analysis"), self.metrics.timed("repo_analysis"):
+                        analysis = await self.analyze_repository(repo)
+                except AbortDive:
+                    aborted = True
+                    raise
+                except Exception as e:
+                    analysis = self._failed_analysis(repo.get('name'), e)
+            done += 1
+            print(f"  [Explorer] Analyzed {done}/{len(target_repos)}...")
+            return analysis
+
+        tasks = [asyncio.create_task(_bounded(r)) for r in target_repos]
+        try:
+            analyses = await asyncio.gather(*tasks)
+        except AbortDive as e:
+            # Terminal error: cancel everything still queued on the semaphore
+            print(f"  [Explorer] Aborting full dive: {str(e)[:200]}")
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            self.metrics.report()
 
         return self._compile_report(analyses)
 
@@ -165,20 +296,20 @@ class ExplorerAgent:
         """
         Compiles individual analyses into a format suitable for the final identity synthesis.
         """
-        # Create a massive consolidated report string
-        full_report_lines = ["# Full-Dive Technical Audit\n"]
-        
-        # Sort by complexity
-        sorted_analyses = sorted(analyses, key=lambda x: x.complexity_score, reverse=True)
+        # Sort by complexity (nothing to order for a single analysis)
+        sorted_analyses = analyses if len(analyses) < 2 else sorted(analyses, key=attrgetter("complexity_score"), reverse=True)
         
-        for analysis in sorted_analyses:
-            full_report_lines.append(f"## {analysis.name} (Complexity: {analysis.complexity_score}/10)")
-            full_report_lines.append(f"**Tech Stack:** {', '.join(analysis.key_technologies)}")
-            full_report_lines.append(f"### Deconstruction")
-            full_report_lines.append(analysis.technical_deconstruction)
-            full_report_lines.append("---\n")
-            
+        # One formatted block per analysis, joined once into the consolidated report
+        blocks = [
+            f"## {a.name} (Complexity: {a.complexity_score}/10)\n"
+            f"**Tech Stack:** {', '.join(a.key_technologies)}\n"
+            "### Deconstruction\n"
+            f"{a.technical_deconstruction}\n"
+            "---\n"
+            for a in sorted_analyses
+        ]
+
         return {
-            "consolidated_report": "\n".join(full_report_lines),
+            "consolidated_report": "\n".join(["# Full-Dive Technical Audit\n", *blocks]),
             "analyses": analyses
         }
@@ -0,0 +1,15 @@
+import os
+import asyncio
+
+def run(coro):
+    """
+    asyncio.run, on uvloop when KOGNIT_UVLOOP is set and uvloop is installed.
+    """
+    if os.getenv("KOGNIT_UVLOOP", "").lower() in ("1", "true", "yes"):
+        try:
+            import uvloop
+        except ImportError:
+            pass
+        else:
+            return uvloop.run(coro)
+    return asyncio.run(coro)
@@ -0,0 +1,36 @@
+import os
+import json
+import time
+import hashlib
+from typing import Any, Optional
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "kognit", "profiles")
+DEFAULT_TTL = 24 * 60 * 60 # Profiles are refreshed daily
+
+def _path(username: str, mode: str) -> str:
+    digest = hashlib.sha1(f"{username.lower()}:{mode}".encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+def load(username: str, mode: str, ttl: int = DEFAULT_TTL) -> Optional[Any]:
+    """
+    Returns the cached payload for (username, mode), or None if missing or older than `ttl` seconds.
+    """
+    path = _path(username, mode)
+    try:
+        if time.time() - os.path.getmtime(path) > ttl:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save(username: str, mode: str, data: Any) -> None:
+    """
+    Stores a JSON-serializable payload for (username, mode). Failures are non-fatal.
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_path(username, mode), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    except (OSError, TypeError) as e:
+        print(f"  > Warning: Could not write profile cache: {e}")
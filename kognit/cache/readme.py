@@ -0,0 +1,45 @@
+import os
+import json
+import time
+import hashlib
+from typing import Any, Dict, Optional
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "kognit", "readmes")
+DEFAULT_TTL = 6 * 60 * 60 # Past this, entries are ignored and the README is downloaded in full
+
+def _path(owner: str, repo: str) -> str:
+    digest = hashlib.sha1(f"{owner.lower()}/{repo.lower()}".encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+def load(owner: str, repo: str, ttl: int = DEFAULT_TTL) -> Optional[Dict[str, Any]]:
+    """
+    Returns {"url", "etag", "text"} for the repo's README, or None if missing or older than `ttl` seconds.
+    """
+    path = _path(owner, repo)
+    try:
+        if time.time() - os.path.getmtime(path) > ttl:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save(owner: str, repo: str, url: str, etag: str, text: str) -> None:
+    """
+    Stores a README with the URL and ETag it was served under. Failures are non-fatal.
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_path(owner, repo), "w", encoding="utf-8") as f:
+            json.dump({"url": url, "etag": etag, "text": text}, f)
+    except OSError as e:
+        print(f"  > Warning: Could not write README cache: {e}")
+
+def touch(owner: str, repo: str) -> None:
+    """
+    Restarts the TTL of an entry the server just confirmed unchanged (304).
+    """
+    try:
+        os.utime(_path(owner, repo))
+    except OSError:
+        pass
@@ -1,37 +1,30 @@
 import argparse
-import sys
+import logging
 import os
+import sys
 import traceback
+from dotenv import load_dotenv
 from rich.console import Console
 from rich.panel import Panel
-from kognit.refinery.engine import synthesize_identity
+from rich.logging import RichHandler
 from kognit.probes.github import GithubProbe
+from kognit import aio
 from kognit.probes.normalizer import normalize_profile_context
 from kognit.renderer.manifest import create_manifest
-from kognit.renderer.engine import render_to_html
-from weasyprint import HTML
-from pdf2image import convert_from_path
+from kognit.cache import profile as profile_cache
 
-console = Console()
+# Load .env up front: GithubProbe reads GITHUB_TOKEN before the refinery is imported
+load_dotenv()
 
-def generate_preview_image(pdf_path: str):
-    """
-    Generates a PNG preview of the first page of the PDF.
-    """
-    try:
-        images = convert_from_path(pdf_path, first_page=1, last_page=1)
-        if images:
-            png_path = pdf_path.replace(".pdf", ".png")
-            images[0].save(png_path, "PNG")
-            console.print(f"[bold green]Preview Generated: {png_path}[/bold green]")
-    except Exception as e:
-        console.print(f"[yellow]Could not generate PNG preview: {e}[/yellow]")
+console = Console()
 
 def main():
     parser = argparse.ArgumentParser(description="Kognit: Technical Biographer Agent")
     parser.add_argument("username", help="GitHub username to profile")
     parser.add_argument("--token", help="GitHub Personal Access Token (optional, overrides env)", default=None)
     parser.add_argument("--model", help="LLM model to use", default="google-gla:gemini-flash-latest")
+    parser.add_argument("--fallback-model", action="append", dest="fallback_models", default=[], metavar="MODEL",
+                        help="Model to fall back to when the primary provider fails (Full Dive). Repeatable.")
     parser.add_argument("--output", help="Path to output PDF or HTML file", default="profile.pdf")
     parser.add_argument("--scraping-mode", choices=["auto", "api", "browser"], default="auto", 
                         help="Choose between GraphQL API (requires token) or Browser-like HTML scraping")
@@ -40,9 +33,18 @@ def main():
     parser.add_argument("--instruction", help="Custom additional instructions for the AI agent", default=None)
     parser.add_argument("--humor", type=int, default=0, help="Humor level (0-100). 0 is professional, 100 is fully humorous.")
     parser.add_argument("--roast", action="store_true", help="Enable Roasting Mode. The agent will ruthlessly critique the profile.")
+    parser.add_argument("--refresh", action="store_true", help="Bypass the cached GitHub profile and fetch fresh data.")
+    parser.add_argument("--stats", action="store_true", help="Print cache hit-rate, concurrency and latency stats after the Full Dive.")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached repository analyses and re-run the LLM for every repo (Full Dive).")
     
     args = parser.parse_args()
 
+    # Package notices (e.g. links the validator removes) are logged at INFO; show them alongside the CLI output.
+    # Only the kognit logger is configured, so httpx and friends stay quiet
+    kognit_log = logging.getLogger("kognit")
+    kognit_log.addHandler(RichHandler(console=console, show_time=False, show_path=False))
+    kognit_log.setLevel(logging.INFO)
+
     # --- Ethical Disclaimer & Confirmation ---
     disclaimer = Panel(
         "[bold red]ETHICAL DISCLAIMER & USAGE WARNING[/bold red]\n\n"
@@ -72,15 +74,27 @@ def main():
     
     console.print(f"[bold blue]Kognit[/bold blue] - Targeting: [cyan]{args.username}[/cyan] | Mode: [magenta]{args.mode}[/magenta] | Tone: {tone_str}")
     
-    gh_probe = GithubProbe(token=args.token)
-    try:
-        with console.status(f"Fetching GitHub Identity ({args.scraping_mode})..."):
-            force_browser = (args.scraping_mode == "browser")
-            raw_github_data = gh_probe.fetch_profile(args.username, use_browser_scraping=force_browser)
-            
-    except Exception as e:
-        console.print(f"[red]GitHub Probe Failed: {e}[/red]")
-        sys.exit(1)
+    # An authenticated fetch (GraphQL, REST listing) and an anonymous scrape yield different payloads
+    auth_mode = "token" if (args.token or os.getenv("GITHUB_TOKEN")) else "anonymous"
+    cache_mode = f"{args.scraping_mode}:{auth_mode}"
+    raw_github_data = None if args.refresh else profile_cache.load(args.username, cache_mode)
+    profile_cached = raw_github_data is not None
+    if profile_cached:
+        console.print("[dim]Using cached GitHub profile (pass --refresh to re-fetch).[/dim]")
+    else:
+        async def _fetch_github():
+            async with GithubProbe(token=args.token) as gh_probe:
+                return await gh_probe.fetch_profile(args.username, use_browser_scraping=force_browser)
+
+        try:
+            with console.status(f"Fetching GitHub Identity ({args.scraping_mode})..."):
+                force_browser = (args.scraping_mode == "browser")
+                raw_github_data = aio.run(_fetch_github())
+                
+        except Exception as e:
+            console.print(f"[red]GitHub Probe Failed: {e}[/red]")
+            sys.exit(1)
+        profile_cache.save(args.username, cache_mode, raw_github_data)
 
     # 2. Normalize & Synthesize
     console.print("[bold yellow]Synthesizing Narrative...[/bold yellow]")
@@ -97,28 +111,36 @@ def main():
         max_readme = 1000
         max_repos = 5
 
-    normalized_context = normalize_profile_context(
-        raw_github_data, 
-        include_readmes=True,
-        max_readme_chars=max_readme,
-        max_repos=max_repos
-    )
+    # The normalized context is only reusable if it was built from the same cached profile
+    context_key = f"{cache_mode}:{args.mode}:context"
+    normalized_context = profile_cache.load(args.username, context_key) if profile_cached else None
+    if normalized_context is None:
+        normalized_context = normalize_profile_context(
+            raw_github_data, 
+            include_readmes=True,
+            max_readme_chars=max_readme,
+            max_repos=max_repos
+        )
+        profile_cache.save(args.username, context_key, normalized_context)
     
     # --- Full Dive: Agentic Exploration ---
     if args.mode == "full-dive":
         try:
             from kognit.agent.explorer import ExplorerAgent
+            from kognit.metrics import Metrics, NullMetrics
             console.print("[bold magenta]Initiating Full-Dive Exploration...[/bold magenta]")
             
             explorer = ExplorerAgent(
                 model_name=args.model, 
                 humor=args.humor, 
                 is_roast=args.roast,
-                custom_instructions=args.instruction
+                custom_instructions=args.instruction,
+                use_cache=not args.no_cache,
+                fallback_models=args.fallback_models,
+                metrics=Metrics() if args.stats else NullMetrics()
             )
             
-            import asyncio
-            dive_results = asyncio.run(explorer.full_dive(raw_github_data.get("data", {}).get("user", {})))
+            dive_results = aio.run(explorer.full_dive(raw_github_data.get("data", {}).get("user", {})))
             
             dive_summary = "\n# Technical Audit Summary (Full details appended to report)\n"
             for analysis in dive_results["analyses"]:
@@ -131,6 +153,14 @@ def main():
             console.print(f"[red]Full Dive Failed: {e}[/red]")
             dive_results = None
     # --------------------------------------
+
+    # READMEs have been consumed by the normalizer (and explorer); release them
+    # so the large blobs are not kept alive through synthesis and PDF rendering
+    user_node = raw_github_data.get("data", {}).get("user", {})
+    for section in ("pinnedItems", "repositories"):
+        for node in (user_node.get(section) or {}).get("nodes") or ():
+            if node:
+                node["readme"] = None
     
     try:
         from kognit.refinery.engine import generate_identity_from_context
@@ -149,12 +179,11 @@ def main():
              identity.repository_analyses = dive_results["analyses"]
 
         # Forced Consistency
-        user_node = raw_github_data.get("data", {}).get("user", {})
         if user_node.get("avatarUrl"):
             identity.avatar_url = user_node.get("avatarUrl")
         github_link = f"https://github.com/{args.username}"
         if github_link not in identity.external_links:
-            identity.external_links.insert(0, github_link)
+            identity.external_links = [github_link, *identity.external_links]
         if user_node.get("name") and not identity.name:
             identity.name = user_node.get("name")
 
@@ -163,14 +192,17 @@ def main():
         # 3. Render
         html_path = args.output.replace(".pdf", ".html")
         manifest = create_manifest(identity)
+        from kognit.renderer.engine import render_to_html # Matplotlib-heavy; only needed at render time
         render_to_html(manifest, html_path)
         
         if args.output.endswith(".pdf"):
-            with console.status("Generating PDF..."):
-                HTML(html_path).write_pdf(args.output)
-            console.print(f"[bold green]PDF Generated: {args.output}[/bold green]")
-            with console.status("Generating Preview..."):
-                generate_preview_image(args.output)
+            # WeasyPrint/Poppler run in a child interpreter so their native memory
+            # is released on exit and never loaded into this process at all
+            from kognit.renderer import worker
+            with console.status("Generating PDF & Preview..."):
+                returncode = worker.spawn(html_path, args.output).wait()
+            if returncode != 0:
+                raise RuntimeError(f"PDF rendering worker exited with code {returncode}")
         else:
             console.print(f"[bold green]Report Generated: {html_path}[/bold green]")
 
@@ -0,0 +1,81 @@
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from typing import Deque, Dict
+
+class Metrics:
+    """
+    In-process counters, timings and concurrency high-water marks used to tune the full dive.
+    """
+    def __init__(self, max_samples: int = 1000):
+        self.counters: Counter = Counter()
+        self.durations: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=max_samples))
+        self._in_flight: Counter = Counter()
+        self.peak_in_flight: Counter = Counter()
+
+    def incr(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+    @contextmanager
+    def timed(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name].append(time.perf_counter() - start)
+
+    @contextmanager
+    def in_flight(self, name: str):
+        self._in_flight[name] += 1
+        self.peak_in_flight[name] = max(self.peak_in_flight[name], self._in_flight[name])
+        try:
+            yield
+        finally:
+            self._in_flight[name] -= 1
+
+    def percentile(self, name: str, q: float) -> float:
+        samples = sorted(self.durations.get(name) or ())
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def report(self):
+        """
+        Prints all collected metrics as a table.
+        """
+        from rich.console import Console
+        from rich.table import Table
+
+        table = Table(title="Kognit Stats")
+        table.add_column("Metric")
+        table.add_column("Value", justify="right")
+
+        hits, misses = self.counters["cache_hit"], self.counters["cache_miss"]
+        if hits + misses:
+            table.add_row("cache hit rate", f"{hits / (hits + misses):.0%} ({hits}/{hits + misses})")
+        for name, value in sorted(self.counters.items()):
+            table.add_row(name, str(value))
+        for name, peak in sorted(self.peak_in_flight.items()):
+            table.add_row(f"{name} peak in-flight", str(peak))
+        for name, samples in sorted(self.durations.items()):
+            table.add_row(
+                f"{name} wall (n={len(samples)})",
+                f"p50 {self.percentile(name, 0.5):.2f}s / p95 {self.percentile(name, 0.95):.2f}s"
+            )
+        Console().print(table)
+
+class NullMetrics:
+    """
+    Drop-in no-op used when stats are disabled, so instrumented code pays nothing.
+    """
+    def incr(self, name: str, n: int = 1):
+        pass
+
+    def timed(self, name: str):
+        return nullcontext()
+
+    def in_flight(self, name: str):
+        return nullcontext()
+
+    def report(self):
+        pass
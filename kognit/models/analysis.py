@@ -1,7 +1,10 @@
 from typing import List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 class RepoAnalysis(BaseModel):
+    # Immutable once produced by the analyst, so cached instances can be shared safely
+    model_config = ConfigDict(frozen=True)
+
     name: str
     summary: str
     technical_deconstruction: str = Field(default="Analysis unavailable.", description="Deep technical breakdown of the repository.")
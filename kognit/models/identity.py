@@ -1,8 +1,10 @@
 from typing import List, Optional, Dict
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from kognit.models.analysis import RepoAnalysis
 
 class ProjectHighlight(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(..., description="Name of the project")
     description: str = Field(..., description="Brief summary of the project and its unique selling point")
     technical_complexity: str = Field(default="Not specified", description="Analysis of the technical challenges and complexity")
@@ -12,17 +14,22 @@ class ProjectHighlight(BaseModel):
     url: Optional[str] = None
 
 class TechnicalDNA(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     languages: List[str] = Field(default_factory=list, description="Primary programming languages with weighted expertise")
     frameworks: List[str] = Field(default_factory=list, description="Frameworks and libraries frequently used")
     tools: List[str] = Field(default_factory=list, description="Development tools and infrastructure (e.g., Docker, K8s, Redis)")
     specialization: str = Field(default="Generalist Systems Engineering", description="Core area of expertise inferred from activity")
 
 class ExternalFootprint(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     writing_style: str = Field(default="Technical and objective", description="Analysis of the developer's writing style and communication")
     interests: List[str] = Field(default_factory=list, description="Research interests or hobbies identified from external sources")
     community_signals: List[str] = Field(default_factory=list, description="Signals of community involvement (e.g., stars, follows, discussions)")
 
 class DeveloperIdentity(BaseModel):
+    # Left mutable: main.py and the validator patch fields after synthesis
     name: str = Field(..., description="Full name or primary handle of the developer")
     avatar_url: Optional[str] = Field(None, description="URL to the developer's profile picture")
     headline: str = Field(..., description="A professional one-liner summarizing the developer's identity")
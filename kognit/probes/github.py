@@ -1,89 +1,123 @@
 import os
+import copy
+import contextlib
+import time
+import functools
+import importlib.util
+from dataclasses import dataclass, field
 import httpx
 import asyncio
-from typing import Dict, Any, Optional, List
-from bs4 import BeautifulSoup
+from typing import Dict, Any, Optional, List, Tuple
+import html
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
+from kognit.cache import readme as readme_cache
 import re
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    import json
+    _json_loads = json.loads
+    _json_dumps = lambda obj: json.dumps(obj, separators=(",", ":")).encode()
+
 GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
 
+# In-process cache lifetimes (seconds): profiles are re-requested within minutes, repo pages change slowly
+PROFILE_CACHE_TTL = 3600
+DETAILS_CACHE_TTL = 1800
+
+# Caps on simultaneous requests to github.com: per repo detail fetch, and per commits/raw README call
+DETAIL_CONCURRENCY = 16
+INNER_CONCURRENCY = 4
+MAX_RETRIES = 3
+
+# Read caps for streamed bodies: analysis only uses the head of a README, and the commits page's
+# embedded JSON (latest commits first) must arrive intact for the first few rows.
+# No consumer reads past README_MAX_CHARS (the explorer's per-repo limit), so READMEs are cut there at fetch time
+README_MAX_CHARS = 8000
+README_MAX_BYTES = 4 * README_MAX_CHARS # Worst case for UTF-8
+COMMITS_PAGE_MAX_BYTES = 512_000
+
+# HTTP/2 multiplexes the detail fan-out over one connection per host; httpx needs the optional h2 package for it
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Scraping patterns, compiled once at import
+# Head/deferred-section tags that the profile strainer drops, read straight from the raw page instead
+_RE_CONTRIB_FRAGMENT = re.compile(rb'<include-fragment[^>]*src="([^"]*tab=contributions[^"]*)"')
+_RE_OG_IMAGE = re.compile(rb'<meta property="og:image" content="([^"]+)"')
+# Starred-repo counter on the profile's Stars tab link
+_RE_STARS_COUNTER = re.compile(rb'tab=stars"[^>]*>(?:(?!</a>).)*?class="Counter"[^>]*>([^<]*)<', re.DOTALL)
+_RE_F4_NORMAL = re.compile(r"f4 text-normal")
+_RE_COMMIT_SHA = re.compile(r"/commit/[a-f0-9]{40}")
+_RE_CONTRIB_COUNT = re.compile(r"([\d,]+)\s+contributions")
+_RE_DIGITS = re.compile(r"([\d,]+)")
+# CSS selectors for the profile and listing pages (soupsieve compiles and caches each one once)
+SEL_P_NAME = "span.p-name"
+SEL_BIO = "div.user-profile-bio"
+SEL_AVATAR = "img.avatar"
+SEL_COMPANY = "span.p-org"
+SEL_LOCATION = "span.p-label"
+SEL_WEBSITE = "a.u-url"
+SEL_TWITTER = "a.Link--primary"
+SEL_FOLLOWERS = "a[href*='tab=followers'] span.text-bold"
+SEL_FOLLOWING = "a[href*='tab=following'] span.text-bold"
+SEL_CONTRIB_H2 = "h2.f4.text-normal.mb-2"
+SEL_PINNED_ITEMS = "ol.js-pinned-items-reorder-list li"
+SEL_PINNED_DESC = "p.pinned-item-desc"
+SEL_PINNED_LINK = "a[data-hydro-click*='PINNED_REPO']"
+SEL_PINNED_REPO = "span.repo"
+SEL_PINNED_STARS = "a[href$='/stargazers']"
+# Plain tag + exact attribute lookups need no CSS engine: (name, attrs) pairs go straight to find()
+FIND_LANGUAGE = ("span", {"itemprop": "programmingLanguage"})
+# Commit-count label on a repo page lives inside the link to its commit history
+SEL_COMMIT_COUNT = "a[href*='/commits/'] span.d-none.d-sm-inline strong, a[href*='/commits/'] strong, a[href*='/commits/'] span"
+
+# Strips thousands separators and whitespace from counts like " 1,234 " in one C-level pass
+_COUNT_TRANS = str.maketrans("", "", ", \t\n")
+# "1.5k" -> ("1.5", "k"), scaled by the suffix multiplier
+_RE_COUNT = re.compile(r"(\d+(?:\.\d+)?)([kKmM]?)")
+_COUNT_SUFFIX = {"": 1, "k": 1000, "m": 1_000_000}
+
+# Repo listing pages go straight to lxml; each field is one precompiled XPath evaluated in C
+_LXML_PARSER = etree.HTMLParser(encoding="utf-8")
+XP_REPO_ITEMS = etree.XPath("//li[@itemprop='owns']")
+XP_REPO_NAME = etree.XPath(".//a[@itemprop='name codeRepository']")
+XP_REPO_DESC = etree.XPath(".//p[@itemprop='description']")
+XP_REPO_LANG = etree.XPath(".//span[@itemprop='programmingLanguage']")
+XP_REPO_STARS = etree.XPath(".//a[contains(@href, 'stargazers')]")
+XP_REPO_TIME = etree.XPath(".//relative-time/@datetime")
+
 # Increased limit to 100 for Deep Dive
-FULL_PROFILE_QUERY = """
-query($login: String!) {
-  user(login: $login) {
-    name
-    login
-    bio
-    websiteUrl
-    location
-    company
-    twitterUsername
-    avatarUrl
-    
-    followers {
-      totalCount
-    }
-    following {
-      totalCount
-    }
-    
-    pinnedItems(first: 6, types: [REPOSITORY, GIST]) {
-      nodes {
-        ... on Repository {
-          name
-          description
-          url
-          stargazerCount
-          primaryLanguage {
-            name
-          }
-          languages(first: 5) {
-            nodes {
-              name
-            }
-          }
-          readme: object(expression: "HEAD:README.md") {
-            ... on Blob {
-              text
-            }
-          }
-          defaultBranchRef {
-            target {
-              ... on Commit {
-                history(first: 4) {
-                  totalCount
-                  nodes {
-                    message
-                  }
-                }
-              }
-            }
-          }
-          tree: object(expression: "HEAD:") {
-            ... on Tree {
-              entries {
-                name
-                type
-              }
-            }
-          }
-        }
-        ... on Gist {
-          name
-          description
-          url
-        }
-      }
-    }
-    
-    repositories(first: 100, orderBy: {field: STARGAZERS, direction: DESC}, isFork: false) {
-      nodes {
+# Shared by the single-user query and the aliased batch query
+PROFILE_FRAGMENT = """
+fragment UserProfile on User {
+  name
+  login
+  bio
+  websiteUrl
+  location
+  company
+  twitterUsername
+  avatarUrl
+  
+  followers {
+    totalCount
+  }
+  following {
+    totalCount
+  }
+  
+  pinnedItems(first: 6, types: [REPOSITORY, GIST]) {
+    nodes {
+      ... on Repository {
         name
         description
         url
         stargazerCount
-        isFork
-        pushedAt
         primaryLanguage {
           name
         }
@@ -92,14 +126,17 @@ query($login: String!) {
             name
           }
         }
-        repositoryTopics(first: 5) {
-          nodes {
-            topic {
-              name
-            }
+        readme: object(expression: "HEAD:README.md") {
+          ... on Blob {
+            text
           }
         }
-        readme: object(expression: "HEAD:README.md") {
+        readmeLower: object(expression: "HEAD:readme.md") {
+          ... on Blob {
+            text
+          }
+        }
+        readmeRst: object(expression: "HEAD:README.rst") {
           ... on Blob {
             text
           }
@@ -125,31 +162,222 @@ query($login: String!) {
           }
         }
       }
-    }
-    
-    starredRepositories(first: 20, orderBy: {field: STARRED_AT, direction: DESC}) {
-      nodes {
-        nameWithOwner
+      ... on Gist {
+        name
         description
         url
       }
     }
-    
-    contributionsCollection {
-      contributionCalendar {
-        totalContributions
+  }
+  
+  repositories(first: 100, orderBy: {field: STARGAZERS, direction: DESC}, isFork: false) {
+    nodes {
+      name
+      description
+      url
+      stargazerCount
+      isFork
+      pushedAt
+      primaryLanguage {
+        name
+      }
+      languages(first: 5) {
+        nodes {
+          name
+        }
+      }
+      repositoryTopics(first: 5) {
+        nodes {
+          topic {
+            name
+          }
+        }
+      }
+      readme: object(expression: "HEAD:README.md") {
+        ... on Blob {
+          text
+        }
+      }
+      readmeLower: object(expression: "HEAD:readme.md") {
+        ... on Blob {
+          text
+        }
+      }
+      readmeRst: object(expression: "HEAD:README.rst") {
+        ... on Blob {
+          text
+        }
+      }
+      defaultBranchRef {
+        target {
+          ... on Commit {
+            history(first: 4) {
+              totalCount
+              nodes {
+                message
+              }
+            }
+          }
+        }
+      }
+      tree: object(expression: "HEAD:") {
+        ... on Tree {
+          entries {
+            name
+            type
+          }
+        }
       }
-      totalCommitContributions
-      totalPullRequestContributions
-      totalIssueContributions
-      totalRepositoryContributions
     }
   }
+  
+  starredRepositories(first: 20, orderBy: {field: STARRED_AT, direction: DESC}) {
+    nodes {
+      nameWithOwner
+      description
+      url
+    }
+  }
+  
+  contributionsCollection {
+    contributionCalendar {
+      totalContributions
+    }
+    totalCommitContributions
+    totalPullRequestContributions
+    totalIssueContributions
+    totalRepositoryContributions
+  }
+}
+"""
+
+FULL_PROFILE_QUERY = PROFILE_FRAGMENT + """
+query($login: String!) {
+  user(login: $login) {
+    ...UserProfile
+  }
 }
 """
 
+# Request body up to the variables, serialized once: '{"query":"..."' (closing brace stripped)
+_FULL_PROFILE_QUERY_BYTES = _json_dumps({"query": FULL_PROFILE_QUERY})[:-1]
+# GitHub logins are alphanumerics and hyphens, so they can be spliced into the JSON body unescaped
+_RE_USERNAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9-]{0,38}")
+
+# Parse-only filters: each page builds just the subtrees its selectors read. A matching tag keeps
+# its whole subtree, so the profile filter lists the sidebar/pinned/contribution containers
+# as well as the leaf classes in case GitHub moves them
+_PROFILE_CLASSES = [
+    "h-card", "js-profile-editable-area", "js-pinned-items-reorder-list", "js-yearly-contributions",
+    "avatar", "p-name", "user-profile-bio", "p-org", "p-label", "u-url", "Link--primary", "Link--secondary", "f4"
+]
+# The filter sees the raw class attribute, so match whole tokens within it
+_PROFILE_STRAINER = SoupStrainer(class_=re.compile(r"(?:^|\s)(?:%s)(?:\s|$)" % "|".join(map(re.escape, _PROFILE_CLASSES))))
+_STARS_STRAINER = SoupStrainer("h3")
+_REPO_PAGE_STRAINER = SoupStrainer("a")
+_CONTRIB_STRAINER = SoupStrainer("h2")
+
+@functools.lru_cache(maxsize=None)
+def _css(selector: str) -> soupsieve.SoupSieve:
+    return soupsieve.compile(selector)
+
+def _select_one(soup, selector):
+    """
+    First match for a CSS string (compiled once) or a (name, attrs) pair.
+    """
+    if isinstance(selector, tuple):
+        name, attrs = selector
+        return soup.find(name, attrs=attrs)
+    return _css(selector).select_one(soup)
+
+def _xp_text(matches: List[Any]) -> Optional[str]:
+    """
+    get_text(strip=True) for the first element of an XPath result, or None when nothing matched.
+    """
+    if not matches:
+        return None
+    return "".join(t.strip() for t in matches[0].itertext())
+
+def _parse_html(content: bytes, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """
+    Parses raw response bytes; GitHub serves UTF-8, so charset sniffing and a separate str decode are skipped.
+    """
+    return BeautifulSoup(content, "lxml", from_encoding="utf-8", parse_only=parse_only)
+
+# Alternate README filenames requested alongside `readme` in the same query, in order of preference
+_README_ALIASES = ("readmeLower", "readmeRst")
+
+def _collapse_readmes(user: Optional[Dict[str, Any]]):
+    """
+    Folds the aliased README candidates of each repo node into `readme` in place,
+    cut to README_MAX_CHARS to match what the raw fetches keep.
+    """
+    if not user:
+        return
+    for conn in ("pinnedItems", "repositories"):
+        for node in (user.get(conn) or {}).get("nodes") or ():
+            if not node:
+                continue
+            readme = node.get("readme")
+            for alias in _README_ALIASES:
+                candidate = node.pop(alias, None)
+                if not (readme and readme.get("text")):
+                    readme = candidate
+            text = readme.get("text") if readme else None
+            if text and len(text) > README_MAX_CHARS:
+                readme = {"text": text[:README_MAX_CHARS]}
+            node["readme"] = readme
+
+@functools.lru_cache(maxsize=32)
+def _build_batch_query(count: int) -> str:
+    """
+    One document fetching `count` users as aliases u0..uN, with logins bound to $l0..$lN.
+    """
+    params = ", ".join(f"$l{i}: String!" for i in range(count))
+    fields = "\n".join(f"  u{i}: user(login: $l{i}) {{ ...UserProfile }}" for i in range(count))
+    return PROFILE_FRAGMENT + f"query({params}) {{\n{fields}\n}}\n"
+
+@dataclass(slots=True)
+class RepoMeta:
+    """
+    Flat per-repo record filled during scraping; converted to the GraphQL-shaped node once at the end.
+    """
+    name: str
+    url: str
+    stars: int
+    desc: str
+    lang: str
+    pushed: str
+    fork: bool = False
+    readme: Optional[str] = None
+    tree: List[Dict[str, str]] = field(default_factory=list)
+    commits: int = 0
+    latest: List[str] = field(default_factory=list)
+
+    def to_node(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "description": self.desc,
+            "url": self.url,
+            "stargazerCount": self.stars,
+            "isFork": self.fork,
+            "pushedAt": self.pushed,
+            "primaryLanguage": {"name": self.lang},
+            "languages": {"nodes": [{"name": self.lang}]},
+            "readme": {"text": self.readme} if self.readme else None,
+            "tree": {"entries": self.tree},
+            "defaultBranchRef": {
+                "target": {
+                    "history": {
+                        "totalCount": self.commits,
+                        "nodes": [{"message": m} for m in self.latest]
+                    }
+                }
+            }
+        }
+
 class GithubProbe:
-    def __init__(self, token: Optional[str] = None):
+    def __init__(self, token: Optional[str] = None, cache_ttl: float = PROFILE_CACHE_TTL, max_repos: int = 30):
         self.token = token or os.getenv("GITHUB_TOKEN")
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -161,38 +389,202 @@ class GithubProbe:
             }
         else:
             self.auth_headers = self.headers
+        self._client: Optional[httpx.AsyncClient] = None
+        self.cache_ttl = cache_ttl
+        # Downstream consumers read at most the first 20 repos; everything past this cap is never fetched
+        self.max_repos = max_repos
+        self._profile_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._details_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._detail_sem: Optional[asyncio.Semaphore] = None
+        self._inner_sem: Optional[asyncio.Semaphore] = None
+        # Default branch that served the last raw README per owner; a user's repos mostly share one convention
+        self._default_branch_hint: Dict[str, str] = {}
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        """
+        Returns the shared client, creating it on first use so every request reuses one connection pool.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                follow_redirects=True,
+                http2=HTTP2_AVAILABLE,
+                # Multiplexed streams make extra connections redundant; HTTP/1.1 still needs one per in-flight request
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=10) if HTTP2_AVAILABLE
+                       else httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=15.0,
+                # Skip charset auto-detection for the JSON/text responses still read via .text
+                default_encoding="utf-8"
+            )
+            # Semaphores are loop-bound like the pool, so they are created alongside it
+            self._detail_sem = asyncio.Semaphore(DETAIL_CONCURRENCY)
+            self._inner_sem = asyncio.Semaphore(INNER_CONCURRENCY)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        # Locks belong to the loop that used them; cached data outlives it
+        self._locks.clear()
+        self._detail_sem = self._inner_sem = None
+
+    async def _get_with_retry(
+        self, client: httpx.AsyncClient, url: str, sem: Optional[asyncio.Semaphore] = None, **kwargs
+    ) -> httpx.Response:
+        """
+        GET that backs off on 429, honouring Retry-After. Any other status (including 404) returns immediately.
+        `sem` is held per attempt, never across the backoff, so a throttled request doesn't pin a slot while it waits.
+        """
+        for attempt in range(MAX_RETRIES):
+            async with sem or contextlib.nullcontext():
+                resp = await client.get(url, **kwargs)
+            if resp.status_code != 429 or attempt == MAX_RETRIES - 1:
+                return resp
+            await asyncio.sleep(self._retry_delay(resp, attempt))
+        return resp
+
+    async def _get_capped(
+        self, client: httpx.AsyncClient, url: str, max_bytes: int, sem: Optional[asyncio.Semaphore] = None, **kwargs
+    ) -> Tuple[int, bytes, httpx.Headers]:
+        """
+        Streamed GET that stops reading after `max_bytes`. Returns (status, body, headers); body is empty unless status is 200.
+        Like `_get_with_retry`, `sem` is only held while a request is in flight.
+        """
+        for attempt in range(MAX_RETRIES):
+            async with sem or contextlib.nullcontext(), client.stream("GET", url, **kwargs) as resp:
+                if resp.status_code != 429 or attempt == MAX_RETRIES - 1:
+                    if resp.status_code != 200:
+                        return resp.status_code, b"", resp.headers
+                    buf = bytearray()
+                    async for chunk in resp.aiter_bytes():
+                        buf += chunk
+                        if len(buf) >= max_bytes:
+                            break
+                    return resp.status_code, bytes(buf[:max_bytes]), resp.headers
+                delay = self._retry_delay(resp, attempt)
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(resp: httpx.Response, attempt: int) -> float:
+        try:
+            delay = float(resp.headers.get("Retry-After", ""))
+        except ValueError:
+            delay = 2 ** attempt
+        return min(delay, 30.0)
+
+    def _lock_for(self, key: str) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    @staticmethod
+    def _cache_get(cache: Dict[str, Tuple[float, Dict[str, Any]]], key: str, ttl: float) -> Optional[Dict[str, Any]]:
+        ts, data = cache.get(key, (0.0, None))
+        if data is not None and time.monotonic() - ts < ttl:
+            # Callers own what they get back (main() drops READMEs in place); keep the cached entry intact
+            return copy.deepcopy(data)
+        return None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def fetch_profile(self, username: str, use_browser_scraping: bool = False) -> Dict[str, Any]:
+        """
+        Runs on the caller's event loop; use the probe as an async context manager so the pool is closed with it.
+        """
+        key = f"profile:{username.lower()}:{'browser' if use_browser_scraping else 'auto'}"
+        # Per-key lock: concurrent requests for the same user share one fetch
+        async with self._lock_for(key):
+            cached = self._cache_get(self._profile_cache, key, self.cache_ttl)
+            if cached is not None:
+                return cached
+            data = await self._fetch_profile_uncached(username, use_browser_scraping)
+            self._profile_cache[key] = (time.monotonic(), copy.deepcopy(data))
+            return data
+
+    async def fetch_profiles_batch(self, usernames: List[str], batch_size: int = 10) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetches many profiles, packing up to `batch_size` users into each aliased GraphQL request.
+        Returns username -> profile in `fetch_profile`'s shape (None for users GitHub couldn't resolve).
+        Without a token each user goes through `fetch_profile` concurrently.
+        """
+        if not self.token:
+            results = await asyncio.gather(*(self.fetch_profile(u) for u in usernames), return_exceptions=True)
+            return {u: (None if isinstance(r, Exception) else r) for u, r in zip(usernames, results)}
 
-    def fetch_profile(self, username: str, use_browser_scraping: bool = False) -> Dict[str, Any]:
+        # Larger documents run into GitHub's query complexity limits
+        chunks = [usernames[i:i + batch_size] for i in range(0, len(usernames), batch_size)]
+        results = await asyncio.gather(*(self._fetch_users_graphql(chunk) for chunk in chunks))
+
+        profiles = {}
+        for chunk, users in zip(chunks, results):
+            for username, user in zip(chunk, users):
+                profile = {"data": {"user": user}} if user else None
+                if profile:
+                    self._profile_cache[f"profile:{username.lower()}:auto"] = (time.monotonic(), copy.deepcopy(profile))
+                profiles[username] = profile
+        return profiles
+
+    async def _fetch_users_graphql(self, usernames: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        One aliased GraphQL request for all `usernames`; entries are None for unknown users.
+        """
+        response = await self._ensure_client().post(
+            GITHUB_GRAPHQL_URL,
+            json={
+                "query": _build_batch_query(len(usernames)),
+                "variables": {f"l{i}": u for i, u in enumerate(usernames)}
+            },
+            headers=self.auth_headers
+        )
+        if response.status_code != 200:
+            raise Exception(f"GitHub API Error: {response.status_code} - {response.text}")
+
+        data = _json_loads(response.content)
+        # Unknown logins only null their own alias; fail only when nothing came back
+        if not data.get("data"):
+            raise Exception(f"GraphQL Error: {data.get('errors')}")
+        users = [data["data"].get(f"u{i}") for i in range(len(usernames))]
+        for user in users:
+            _collapse_readmes(user)
+        return users
+
+    async def _fetch_profile_uncached(self, username: str, use_browser_scraping: bool = False) -> Dict[str, Any]:
         if self.token and not use_browser_scraping:
             try:
                 print("  > Attempting Authenticated GraphQL Query (Deep Dive)...")
-                return self._fetch_via_api(username)
+                return await self._fetch_via_api(username)
             except Exception as e:
                 print(f"  > API failed ({e}). Falling back to Browser Scraping...")
-                return asyncio.run(self._scrape_via_html(username))
+                return await self._scrape_via_html(username)
         else:
             print("  > Using Browser Scraping Mode (Deep Dive)...")
-            return asyncio.run(self._scrape_via_html(username))
-
-    def _fetch_via_api(self, username: str) -> Dict[str, Any]:
-        async def _run():
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    GITHUB_GRAPHQL_URL,
-                    json={"query": FULL_PROFILE_QUERY, "variables": {"login": username}},
-                    headers=self.auth_headers,
-                    timeout=15.0
-                )
-                if response.status_code != 200:
-                    raise Exception(f"GitHub API Error: {response.status_code} - {response.text}")
-                
-                data = response.json()
-                if "errors" in data:
-                    raise Exception(f"GraphQL Error: {data['errors']}")
-                
-                return data
+            return await self._scrape_via_html(username)
 
-        return asyncio.run(_run())
+    async def _fetch_via_api(self, username: str) -> Dict[str, Any]:
+        if not _RE_USERNAME.fullmatch(username):
+            raise ValueError(f"Invalid GitHub username: {username!r}")
+        body = _FULL_PROFILE_QUERY_BYTES + b',"variables":{"login":"' + username.encode() + b'"}}'
+        response = await self._ensure_client().post(
+            GITHUB_GRAPHQL_URL,
+            content=body,
+            headers={**self.auth_headers, "Content-Type": "application/json"}
+        )
+        if response.status_code != 200:
+            raise Exception(f"GitHub API Error: {response.status_code} - {response.text}")
+        
+        data = _json_loads(response.content)
+        if "errors" in data:
+            raise Exception(f"GraphQL Error: {data['errors']}")
+        
+        _collapse_readmes((data.get("data") or {}).get("user"))
+        return data
 
     async def _scrape_via_html(self, username: str) -> Dict[str, Any]:
         """
@@ -200,95 +592,98 @@ class GithubProbe:
         """
         base_url = f"https://github.com/{username}"
         
-        async with httpx.AsyncClient(headers=self.headers, follow_redirects=True) as client:
-            # 1. Fetch Main Profile and Tabs
-            tasks = [
-                client.get(base_url),
-                client.get(f"{base_url}?tab=stars")
-            ]
-            resp_main, resp_stars = await asyncio.gather(*tasks)
-            
-            if resp_main.status_code == 404:
-                raise Exception("User not found")
-            
-            soup_main = BeautifulSoup(resp_main.text, "html.parser")
-            soup_stars = BeautifulSoup(resp_stars.text, "html.parser")
+        client = self._ensure_client()
+        # 1. Fetch Main Profile and Tabs. The repo listing doesn't depend on the main page,
+        # so it is requested speculatively in the same round trip
+        tasks = [
+            client.get(base_url),
+            self._fetch_repos_via_rest(username) if self.token else self._get_listing_page(client, username, 1)
+        ]
+        resp_main, listing = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if isinstance(resp_main, Exception):
+            raise resp_main
+        if resp_main.status_code == 404:
+            raise Exception("User not found")
+
+        # The stars tab is only worth a request when the profile's counter isn't zero. It then
+        # runs in the background while the profile and repos are processed
+        stars_counter = _RE_STARS_COUNTER.search(resp_main.content)
+        stars_task = None
+        if not stars_counter or self._parse_count(stars_counter.group(1).decode()) > 0:
+            stars_task = asyncio.create_task(self._fetch_starred_page(client, f"{base_url}?tab=stars"))
+
+        try:
+            # Parse off the event loop so in-flight requests keep being serviced meanwhile
+            soup_main = await asyncio.to_thread(_parse_html, resp_main.content, _PROFILE_STRAINER)
 
             # --- Identity & Metadata ---
-            user_data = {}
-            name_tag = soup_main.find("span", class_="p-name")
-            user_data["name"] = name_tag.get_text(strip=True) if name_tag else username
-            user_data["login"] = username
-            
-            bio_tag = soup_main.find("div", class_="user-profile-bio")
-            user_data["bio"] = bio_tag.get_text(strip=True) if bio_tag else ""
-            
+            user_data = {
+                "name": self._get_text(soup_main, SEL_P_NAME) or username,
+                "login": username,
+                "bio": self._get_text(soup_main, SEL_BIO) or "",
+                "company": self._get_text(soup_main, SEL_COMPANY),
+                "location": self._get_text(soup_main, SEL_LOCATION),
+                "websiteUrl": self._get_href(soup_main, SEL_WEBSITE),
+                "twitterUsername": self._get_href(soup_main, SEL_TWITTER),
+                "followers": {"totalCount": self._parse_count(self._get_text(soup_main, SEL_FOLLOWERS) or "0")},
+                "following": {"totalCount": self._parse_count(self._get_text(soup_main, SEL_FOLLOWING) or "0")}
+            }
+        
             # Avatar
-            avatar_img = soup_main.find("img", class_="avatar")
+            avatar_img = _select_one(soup_main, SEL_AVATAR)
             if avatar_img:
                 user_data["avatarUrl"] = avatar_img['src']
             else:
-                og_image = soup_main.find("meta", property="og:image")
-                user_data["avatarUrl"] = og_image["content"] if og_image else None
-
-            user_data["company"] = self._get_text(soup_main, "span", "p-org")
-            user_data["location"] = self._get_text(soup_main, "span", "p-label")
-            user_data["websiteUrl"] = self._get_href(soup_main, "a", "u-url")
-            user_data["twitterUsername"] = self._get_href(soup_main, "a", "Link--primary")
-            
-            # Counts
-            followers_a = soup_main.select_one(f"a[href*='tab=followers'] span.text-bold")
-            user_data["followers"] = {"totalCount": self._parse_count(followers_a.get_text(strip=True)) if followers_a else 0}
-            
-            following_a = soup_main.select_one(f"a[href*='tab=following'] span.text-bold")
-            user_data["following"] = {"totalCount": self._parse_count(following_a.get_text(strip=True)) if following_a else 0}
+                og_image = _RE_OG_IMAGE.search(resp_main.content)
+                user_data["avatarUrl"] = html.unescape(og_image.group(1).decode()) if og_image else None
 
             # Contributions
-            contrib_h2 = soup_main.find("h2", class_="f4 text-normal mb-2")
+            contrib_h2 = _select_one(soup_main, SEL_CONTRIB_H2)
             total_contribs = 0
-            
+        
             if not contrib_h2:
                 # GitHub often loads contributions via include-fragment
-                fragment = soup_main.find("include-fragment", src=re.compile(r"tab=contributions"))
+                fragment = _RE_CONTRIB_FRAGMENT.search(resp_main.content)
                 if fragment:
-                    fragment_url = f"https://github.com{fragment['src']}"
+                    fragment_url = f"https://github.com{html.unescape(fragment.group(1).decode())}"
                     try:
                         resp_frag = await client.get(
                             fragment_url, 
                             headers={**self.headers, "X-Requested-With": "XMLHttpRequest"}
                         )
                         if resp_frag.status_code == 200:
-                            soup_frag = BeautifulSoup(resp_frag.text, "html.parser")
+                            soup_frag = _parse_html(resp_frag.content, _CONTRIB_STRAINER)
                             # The h2 in the fragment might have slightly different classes
-                            contrib_h2 = soup_frag.find("h2", class_=re.compile(r"f4 text-normal"))
+                            contrib_h2 = soup_frag.find("h2", class_=_RE_F4_NORMAL)
                     except Exception as e:
                         print(f"  > Warning: Failed to fetch contribution fragment: {e}")
 
             if contrib_h2:
-                match = re.search(r"([\d,]+)\s+contributions", contrib_h2.get_text())
+                match = _RE_CONTRIB_COUNT.search(contrib_h2.get_text())
                 if match:
                     total_contribs = int(match.group(1).replace(",", ""))
-            
+        
             user_data["contributionsCollection"] = {"contributionCalendar": {"totalContributions": total_contribs}}
 
             # --- Pinned Items ---
             pinned_nodes = []
-            pinned_list = soup_main.select("ol.js-pinned-items-reorder-list li")
+            pinned_list = _css(SEL_PINNED_ITEMS).select(soup_main)
             pinned_fetch_tasks = []
 
-            for item in pinned_list:
-                repo_link_el = item.select_one("a[data-hydro-click*='PINNED_REPO']")
+            for item in pinned_list[:self.max_repos]:
+                repo_link_el = _select_one(item, SEL_PINNED_LINK)
                 if not repo_link_el:
-                    repo_link_el = item.select_one("a")
-                
+                    repo_link_el = item.find("a")
+            
                 repo_path = repo_link_el.get("href", "") if repo_link_el else ""
-                repo_name = item.select_one("span.repo").get_text(strip=True)
-                desc = self._get_text(item, "p", "pinned-item-desc") or ""
-                lang = self._get_text(item, "span", "itemprop='programmingLanguage'") or "Unknown"
-                
-                star_a = item.select_one("a[href$='/stargazers']")
+                repo_name = _select_one(item, SEL_PINNED_REPO).get_text(strip=True)
+                desc = self._get_text(item, SEL_PINNED_DESC) or ""
+                lang = self._get_text(item, FIND_LANGUAGE) or "Unknown"
+            
+                star_a = _select_one(item, SEL_PINNED_STARS)
                 stars = self._parse_count(star_a.get_text(strip=True)) if star_a else 0
-                
+            
                 full_url = f"https://github.com{repo_path}"
                 node = {
                     "name": repo_name,
@@ -315,226 +710,438 @@ class GithubProbe:
                         }
                     }
                 }
-            
+        
             user_data["pinnedItems"] = {"nodes": pinned_nodes}
 
-            # --- Repositories (Pagination) ---
-            print("  > Scraping Repositories (Pages 1-3)...")
-            repo_nodes = []
-            
-            # Fetch up to 3 pages concurrently (approx 90 repos)
-            page_tasks = [client.get(f"{base_url}?tab=repositories&page={i}") for i in range(1, 4)]
-            page_responses = await asyncio.gather(*page_tasks)
-            
-            all_repo_items = []
-            for resp in page_responses:
-                soup_page = BeautifulSoup(resp.text, "html.parser")
-                all_repo_items.extend(soup_page.select("li[itemprop='owns']"))
-
-            repo_metadata = []
-            repo_fetch_tasks = []
-
-            for item in all_repo_items:
-                name_tag = item.select_one("a[itemprop='name codeRepository']")
-                if not name_tag: continue
-                
-                r_name = name_tag.get_text(strip=True)
-                r_url = f"https://github.com{name_tag['href']}"
-                r_desc = self._get_text(item, "p", "itemprop='description'") or ""
-                r_lang = self._get_text(item, "span", "itemprop='programmingLanguage'") or "N/A"
-                
-                r_star_a = item.select_one("a[href*='stargazers']")
-                r_stars = self._parse_count(r_star_a.get_text(strip=True)) if r_star_a else 0
-                
-                r_time = item.select_one("relative-time")
-                r_date = r_time['datetime'] if r_time else "Unknown"
-
-                meta = {
-                    "name": r_name,
-                    "description": r_desc,
-                    "url": r_url,
-                    "stargazerCount": r_stars,
-                    "isFork": False,
-                    "pushedAt": r_date,
-                    "primaryLanguage": {"name": r_lang},
-                    "languages": {"nodes": [{"name": r_lang}]}
-                }
-                repo_metadata.append(meta)
-                repo_fetch_tasks.append(self._fetch_repo_details_async(client, r_url))
+            # --- Repositories ---
+            if self.token and isinstance(listing, list):
+                repo_metadata = listing
+            else:
+                print("  > Scraping Repositories (Pages 1-3)...")
+                # When the REST listing failed, page 1 wasn't prefetched either
+                first_page = None if self.token else listing
+                repo_metadata = await self._scrape_repo_listing(client, username, first_page)
 
             # Fetch ALL Details concurrently
             print(f"  > Fetching metadata and structure for {len(repo_metadata)} repositories...")
-            all_details = await asyncio.gather(*repo_fetch_tasks)
-            
+            all_details = await asyncio.gather(*(self._fetch_repo_details_async(client, meta.url) for meta in repo_metadata))
+        
             for meta, details in zip(repo_metadata, all_details):
-                meta["readme"] = {"text": details["readme"]} if details["readme"] else None
-                meta["tree"] = {"entries": details["tree"]}
-                meta["defaultBranchRef"] = {
-                    "target": {
-                        "history": {
-                            "totalCount": details["commits"],
-                            "nodes": [{"message": m} for m in details["latest_commits"]]
-                        }
-                    }
-                }
-                repo_nodes.append(meta)
+                meta.readme, meta.tree, meta.commits, meta.latest = (
+                    details["readme"], details["tree"], details["commits"], details["latest_commits"]
+                )
 
-            user_data["repositories"] = {"nodes": repo_nodes}
+            user_data["repositories"] = {"nodes": [meta.to_node() for meta in repo_metadata]}
 
             # --- Starred Repos ---
             starred_nodes = []
-            star_items = soup_stars.select("div.col-lg-12") # Starred repos usually in a list
             # GitHub stars page structure varies, usually: "div.d-inline-block.mb-1 h3 a"
-            
+        
             # Simple fallback scrape for stars (Top 10)
-            s_links = soup_stars.select("h3 a")
-            for link in s_links[:10]:
+            stars_html = await stars_task if stars_task else b""
+            s_links = []
+            if stars_html:
+                soup_stars = await asyncio.to_thread(_parse_html, stars_html, _STARS_STRAINER)
+                s_links = _css("h3 a").select(soup_stars, limit=10)
+            for link in s_links:
                 owner_repo = link.get('href', '').strip('/')
                 starred_nodes.append({
                     "nameWithOwner": owner_repo,
                     "description": "Scraped via Web",
                     "url": f"https://github.com/{owner_repo}"
                 })
-            
+        
             user_data["starredRepositories"] = {"nodes": starred_nodes}
 
             return {"data": {"user": user_data}}
+        finally:
+            # Reached early by an exception, the stars request must not be left running unowned
+            if stars_task:
+                stars_task.cancel()
+                await asyncio.gather(stars_task, return_exceptions=True)
+
+    async def _fetch_starred_page(self, client: httpx.AsyncClient, url: str) -> bytes:
+        """
+        Body of the stars tab, or b"" when it couldn't be fetched.
+        """
+        try:
+            resp = await client.get(url)
+        except httpx.HTTPError:
+            return b""
+        return resp.content if resp.status_code == 200 else b""
+
+    def _get_listing_page(self, client: httpx.AsyncClient, username: str, page: int):
+        return client.get(f"https://github.com/{username}?tab=repositories&page={page}")
+
+    async def _scrape_repo_listing(self, client: httpx.AsyncClient, username: str, first_page: Any = None) -> List[RepoMeta]:
+        """
+        Walks up to three HTML listing pages (approx 90 repos), stopping as soon as `max_repos` are collected.
+        """
+        repo_metadata = []
+        for page in range(1, 4):
+            if page == 1 and first_page is not None:
+                resp = first_page
+            else:
+                try:
+                    resp = await self._get_listing_page(client, username, page)
+                except httpx.HTTPError:
+                    break
+            if not isinstance(resp, httpx.Response):
+                break
+            items = await asyncio.to_thread(self._parse_repo_listing, [resp])
+            repo_metadata.extend(items)
+            if not items or len(repo_metadata) >= self.max_repos:
+                break
+        return repo_metadata[:self.max_repos]
+
+    async def _fetch_repos_via_rest(self, username: str) -> Optional[List[RepoMeta]]:
+        """
+        Repo metadata from /users/:u/repos in the scraper's node schema. None when the call fails.
+        """
+        try:
+            resp = await self._ensure_client().get(
+                f"https://api.github.com/users/{username}/repos",
+                params={"per_page": min(self.max_repos, 100), "sort": "pushed"},
+                headers=self._rest_headers()
+            )
+            if resp.status_code != 200:
+                return None
+            repos = _json_loads(resp.content)
+        except Exception as e:
+            print(f"  > Warning: REST repo listing failed ({e}). Falling back to HTML pages...")
+            return None
+
+        return [
+            RepoMeta(
+                name=r["name"],
+                url=r["html_url"],
+                stars=r.get("stargazers_count", 0),
+                desc=r.get("description") or "",
+                lang=r.get("language") or "N/A",
+                pushed=r.get("pushed_at") or "Unknown",
+                fork=r.get("fork", False)
+            )
+            for r in repos
+        ]
+
+    def _parse_repo_listing(self, page_responses: List[Any]) -> List[RepoMeta]:
+        """
+        Repo metadata from the HTML repositories tab pages. Failed page requests are skipped.
+        """
+        page_responses = [resp for resp in page_responses if isinstance(resp, httpx.Response)]
+        
+        # lxml trees instead of full-page soups; cards are found structurally, so nested <li>s stay inside them
+        roots = [etree.fromstring(resp.content, _LXML_PARSER) for resp in page_responses if resp.content]
+        items = [item for root in roots if root is not None for item in XP_REPO_ITEMS(root)]
+
+        repo_metadata = []
+        for item in items:
+            name_tag = XP_REPO_NAME(item)
+            if not name_tag: continue
+            
+            r_name = _xp_text(name_tag)
+            r_url = f"https://github.com{name_tag[0].get('href')}"
+            r_desc = _xp_text(XP_REPO_DESC(item)) or ""
+            r_lang = _xp_text(XP_REPO_LANG(item)) or "N/A"
+            
+            r_star_a = XP_REPO_STARS(item)
+            r_stars = self._parse_count(_xp_text(r_star_a)) if r_star_a else 0
+            
+            r_time = XP_REPO_TIME(item)
+            r_date = r_time[0] if r_time else "Unknown"
+
+            repo_metadata.append(RepoMeta(r_name, r_url, r_stars, r_desc, r_lang, r_date))
+        return repo_metadata
 
     async def _fetch_repo_details_async(self, client: httpx.AsyncClient, repo_url: str) -> Dict[str, Any]:
+        """
+        Cached wrapper around `_fetch_repo_details_uncached`, keyed by repo URL.
+        """
+        key = f"details:{repo_url}"
+        async with self._lock_for(key):
+            cached = self._cache_get(self._details_cache, key, DETAILS_CACHE_TTL)
+            if cached is not None:
+                return cached
+            async with self._detail_sem:
+                details = await self._fetch_repo_details_uncached(client, repo_url)
+            self._details_cache[key] = (time.monotonic(), copy.deepcopy(details))
+            return details
+
+    async def _fetch_repo_details_uncached(self, client: httpx.AsyncClient, repo_url: str) -> Dict[str, Any]:
         """
         Fetches README, Root structure, latest commits, and total commits for a repo.
+        Each part comes from its lightest endpoint; the HTML repo page is only parsed for what REST couldn't supply.
         """
         details = {"readme": None, "tree": [], "commits": 0, "latest_commits": []}
-        
+        owner, repo = repo_url.rstrip("/").split("/")[-2:]
+
         try:
-            # 1. Fetch Main Page for structure and commit count
-            resp = await client.get(repo_url)
-            if resp.status_code == 200:
-                soup = BeautifulSoup(resp.text, "html.parser")
-                
-                # --- Commit Count ---
-                commit_text = soup.find(lambda tag: tag.name == "span" and "commits" in tag.get_text().lower())
-                if commit_text:
-                    match = re.search(r"([\d,]+)", commit_text.get_text())
-                    if match:
-                        details["commits"] = self._parse_count(match.group(1))
-                
-                if details["commits"] == 0:
-                    commit_span = soup.select_one("span.d-none.d-sm-inline strong")
-                    if commit_span:
-                        details["commits"] = self._parse_count(commit_span.get_text(strip=True))
+            if self.token:
+                readme, tree, (total, msgs) = await asyncio.gather(
+                    self._fetch_readme(client, owner, repo),
+                    self._fetch_tree(client, owner, repo),
+                    self._fetch_commits(client, owner, repo)
+                )
+                if tree is None or total is None:
+                    page_tree, page_total, _ = await self._fetch_repo_page(client, repo_url)
+                    tree = page_tree if tree is None else tree
+                    total = page_total if total is None else total
+            else:
+                # Without REST access the HTML page is the only source of tree and count. It also links the
+                # README on the real default branch, so the README is then a single GET instead of a branch probe
+                (tree, total, readme_ref), (_, msgs) = await asyncio.gather(
+                    self._fetch_repo_page(client, repo_url),
+                    self._fetch_commits(client, owner, repo)
+                )
+                readme = await self._fetch_readme(client, owner, repo, readme_ref)
 
-                # --- Latest Commit Messages ---
-                try:
-                    commits_url = f"{repo_url}/commits"
-                    c_resp = await client.get(commits_url)
-                    if c_resp.status_code == 200:
-                        c_soup = BeautifulSoup(c_resp.text, "html.parser")
-                        msgs = []
-                        
-                        # Try JSON first (Modern GitHub)
-                        c_embedded = c_soup.find("script", {"data-target": "react-app.embeddedData"})
-                        if c_embedded:
-                            try:
-                                c_json = json.loads(c_embedded.get_text())
-                                payload = c_json.get("payload") or {}
-                                groups = payload.get("commitGroups") or []
-                                for group in groups:
-                                    if not group: continue
-                                    commits = group.get("commits") or []
-                                    for c in commits:
-                                        if not c: continue
-                                        msg = c.get("shortMessage")
-                                        if msg and msg not in msgs:
-                                            msgs.append(msg)
-                                        if len(msgs) >= 4: break
-                                    if len(msgs) >= 4: break
-                            except:
-                                pass
-                        
-                        # Fallback to selectors if JSON failed or was empty
-                        if not msgs:
-                            # 1. Modern: data-testid="commit-row-item-message" or similar inside rows
-                            # Often rows are <li> or <div>
-                            commit_rows = c_soup.select("div[data-testid='commit-row-item'], li.Box-row")
-                            for row in commit_rows:
-                                msg_link = row.select_one("h4 a, a.Link--primary, .commit-title a")
-                                if msg_link:
-                                    text = msg_link.get_text(strip=True)
-                                    if text and text not in msgs:
-                                        msgs.append(text)
-                                if len(msgs) >= 4: break
-                            
-                            # 2. Ultra-fallback: just find any Links that look like commits
-                            if not msgs:
-                                all_commit_links = c_soup.find_all("a", href=re.compile(r"/commit/[a-f0-9]{40}"))
-                                for link in all_commit_links:
-                                    text = link.get_text(strip=True)
-                                    # Filter out the SHA-only links
-                                    if text and len(text) > 8 and text not in msgs:
-                                        msgs.append(text)
-                                    if len(msgs) >= 4: break
-                        
-                        if msgs:
-                            details["latest_commits"] = msgs
-                except:
-                    pass
-
-                # --- Tree Structure ---
-                links = soup.select("a.Link--primary")
-                seen_names = set()
-                
-                # Extract repo path for child check
-                repo_path = "/" + "/".join(repo_url.split("/")[-2:]) # /user/repo
-                
-                for link in links:
-                    href = link.get("href", "")
-                    name = link.get_text(strip=True)
-                    
-                    if not name or name in seen_names:
-                        continue
-                    
-                    if f"{repo_path}/tree/" in href or f"{repo_path}/blob/" in href:
-                        parts = href.strip("/").split("/")
-                        if len(parts) >= 5:
-                            seen_names.add(name)
-                            e_type = "tree" if "/tree/" in href else "blob"
-                            details["tree"].append({"name": name, "type": e_type})
-
-            # 2. Fetch README (Raw)
-            raw_url = repo_url.replace("github.com", "raw.githubusercontent.com")
-            branches = ["main", "master"]
-            for branch in branches:
-                r_resp = await client.get(f"{raw_url}/{branch}/README.md")
-                if r_resp.status_code == 200:
-                    details["readme"] = r_resp.text
-                    break
+            details["readme"] = readme
+            details["tree"] = tree
+            details["commits"] = total
+            if msgs:
+                details["latest_commits"] = msgs
         except Exception as e:
             print(f"  > Warning: Detail fetch failed for {repo_url}: {e}")
             
         return details
 
-    def _get_text(self, soup, tag, selector_str):
-        # Helper that handles class or prop attributes roughly
-        if "=" in selector_str:
-            attr, val = selector_str.split("=")
-            val = val.strip("'\"")
-            el = soup.find(tag, attrs={attr: val})
+    def _rest_headers(self) -> Dict[str, str]:
+        return {**self.auth_headers, "Accept": "application/vnd.github+json"}
+
+    async def _fetch_readme(self, client: httpx.AsyncClient, owner: str, repo: str, readme_ref: Optional[str] = None) -> Optional[str]:
+        """
+        README text via the REST readme endpoint (any branch or filename) when authenticated, else from raw:
+        `readme_ref` ("<branch>/<file>" as linked from the repo page) when known, falling back to main/master.
+        """
+        cached = readme_cache.load(owner, repo)
+        if self.token:
+            status, text = await self._get_readme(
+                client, owner, repo, f"https://api.github.com/repos/{owner}/{repo}/readme", cached,
+                {**self.auth_headers, "Accept": "application/vnd.github.raw+json"}
+            )
+            # The endpoint resolves any branch and filename, so a 404 means there is no README at all.
+            # Raw URLs are only tried when the API itself failed
+            if text is not None or status == 404:
+                return text
+
+        raw_url = f"https://raw.githubusercontent.com/{owner}/{repo}"
+        if readme_ref:
+            _, text = await self._get_readme(client, owner, repo, f"{raw_url}/{readme_ref}", cached)
+            if text is not None:
+                self._default_branch_hint[owner] = readme_ref.rsplit("/", 1)[0]
+                return text
+
+        hint = self._default_branch_hint.get(owner)
+        if hint:
+            branches = [hint, "master" if hint == "main" else "main"]
         else:
-            el = soup.find(tag, class_=selector_str)
+            # No hint yet: probe both branches with HEADs in parallel and only GET the one that exists
+            async with self._inner_sem:
+                heads = await asyncio.gather(
+                    client.head(f"{raw_url}/main/README.md"),
+                    client.head(f"{raw_url}/master/README.md"),
+                    return_exceptions=True
+                )
+            branches = [
+                branch for branch, head in zip(["main", "master"], heads)
+                if isinstance(head, httpx.Response) and head.status_code == 200
+            ]
+
+        for branch in branches:
+            if f"{branch}/README.md" == readme_ref:
+                continue
+            _, text = await self._get_readme(client, owner, repo, f"{raw_url}/{branch}/README.md", cached)
+            if text is not None:
+                self._default_branch_hint[owner] = branch
+                return text
+        return None
+
+    async def _get_readme(
+        self, client: httpx.AsyncClient, owner: str, repo: str, url: str,
+        cached: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[Optional[int], Optional[str]]:
+        """
+        Capped README GET, revalidated by ETag against the on-disk copy so unchanged READMEs come back as bodiless 304s.
+        Returns (status, text); status is None when the request itself failed, text is None unless a README was found.
+        """
+        headers = dict(headers or {})
+        if cached and cached.get("url") == url:
+            headers["If-None-Match"] = cached["etag"]
+        try:
+            status, body, resp_headers = await self._get_capped(
+                client, url, README_MAX_BYTES, sem=self._inner_sem, headers=headers
+            )
+        except httpx.HTTPError:
+            # A dropped README shouldn't take the repo's tree and commits down with it
+            return None, None
+        if status == 304 and cached:
+            readme_cache.touch(owner, repo)
+            return status, cached["text"]
+        if status != 200:
+            return status, None
+        text = self._decode_readme(body)
+        etag = resp_headers.get("ETag")
+        if etag:
+            readme_cache.save(owner, repo, url, etag, text)
+        return status, text
+
+    @staticmethod
+    def _decode_readme(body: bytes) -> str:
+        # The byte cap can land mid-character; drop the partial sequence
+        return body.decode("utf-8", errors="ignore")[:README_MAX_CHARS]
+
+    async def _fetch_tree(self, client: httpx.AsyncClient, owner: str, repo: str) -> Optional[List[Dict[str, str]]]:
+        """
+        Root entries from the REST contents API. None when unauthenticated or the call fails.
+        """
+        if not self.token:
+            return None
+        try:
+            resp = await self._get_with_retry(
+                client, f"https://api.github.com/repos/{owner}/{repo}/contents",
+                sem=self._inner_sem, headers=self._rest_headers()
+            )
+            if resp.status_code != 200:
+                return None
+            return [
+                {"name": entry["name"], "type": "tree" if entry.get("type") == "dir" else "blob"}
+                for entry in _json_loads(resp.content)
+            ]
+        except Exception:
+            return None
+
+    async def _fetch_commits(self, client: httpx.AsyncClient, owner: str, repo: str) -> Tuple[Optional[int], List[str]]:
+        """
+        Returns (total commit count, up to 4 latest messages). The count is None when only HTML was available.
+        """
+        if self.token:
+            try:
+                commits_api = f"https://api.github.com/repos/{owner}/{repo}/commits"
+                # per_page=1 makes the "last" page number in the Link header the total commit count
+                count_resp, msgs_resp = await asyncio.gather(
+                    self._get_with_retry(client, commits_api, sem=self._inner_sem, params={"per_page": 1}, headers=self._rest_headers()),
+                    self._get_with_retry(client, commits_api, sem=self._inner_sem, params={"per_page": 4}, headers=self._rest_headers())
+                )
+                if count_resp.status_code == 200 and msgs_resp.status_code == 200:
+                    last = count_resp.links.get("last")
+                    total = int(httpx.URL(last["url"]).params["page"]) if last else len(_json_loads(count_resp.content))
+                    msgs = [c["commit"]["message"].split("\n", 1)[0] for c in _json_loads(msgs_resp.content)]
+                    return total, msgs
+            except Exception:
+                pass
+
+        msgs = []
+        try:
+            status, c_html, _ = await self._get_capped(
+                client, f"https://github.com/{owner}/{repo}/commits", COMMITS_PAGE_MAX_BYTES, sem=self._inner_sem
+            )
+            if status == 200:
+                c_soup = await asyncio.to_thread(_parse_html, c_html)
+                
+                # Try JSON first (Modern GitHub)
+                c_embedded = c_soup.find("script", {"data-target": "react-app.embeddedData"})
+                if c_embedded:
+                    try:
+                        c_json = _json_loads(c_embedded.get_text())
+                        payload = c_json.get("payload") or {}
+                        groups = payload.get("commitGroups") or []
+                        for group in groups:
+                            if not group: continue
+                            commits = group.get("commits") or []
+                            for c in commits:
+                                if not c: continue
+                                msg = c.get("shortMessage")
+                                if msg and msg not in msgs:
+                                    msgs.append(msg)
+                                if len(msgs) >= 4: break
+                            if len(msgs) >= 4: break
+                    except (ValueError, AttributeError, TypeError):
+                        # Malformed or reshaped payload: fall through to the selectors below
+                        pass
+                
+                # Fallback to selectors if JSON failed or was empty
+                if not msgs:
+                    # 1. Modern: data-testid="commit-row-item-message" or similar inside rows
+                    # Often rows are <li> or <div>
+                    commit_rows = _css("div[data-testid='commit-row-item'], li.Box-row").select(c_soup)
+                    for row in commit_rows:
+                        msg_link = _select_one(row, "h4 a, a.Link--primary, .commit-title a")
+                        if msg_link:
+                            text = msg_link.get_text(strip=True)
+                            if text and text not in msgs:
+                                msgs.append(text)
+                        if len(msgs) >= 4: break
+                    
+                    # 2. Ultra-fallback: just find any Links that look like commits
+                    if not msgs:
+                        all_commit_links = c_soup.find_all("a", href=_RE_COMMIT_SHA)
+                        for link in all_commit_links:
+                            text = link.get_text(strip=True)
+                            # Filter out the SHA-only links
+                            if text and len(text) > 8 and text not in msgs:
+                                msgs.append(text)
+                            if len(msgs) >= 4: break
+        except httpx.HTTPError:
+            pass
+        return None, msgs
+
+    async def _fetch_repo_page(self, client: httpx.AsyncClient, repo_url: str) -> Tuple[List[Dict[str, str]], int, Optional[str]]:
+        """
+        HTML fallback: parses root structure, total commit count and the root README's "<branch>/<file>" from the repo page.
+        """
+        tree, total, readme_ref = [], 0, None
+        resp = await self._get_with_retry(client, repo_url)
+        if resp.status_code != 200:
+            return tree, total, readme_ref
+        soup = await asyncio.to_thread(_parse_html, resp.content, _REPO_PAGE_STRAINER)
+        
+        # --- Commit Count ---
+        for commit_el in _css(SEL_COMMIT_COUNT).select(soup):
+            match = _RE_DIGITS.search(commit_el.get_text())
+            if match:
+                total = self._parse_count(match.group(1))
+                break
+        
+        if total == 0:
+            commit_span = _select_one(soup, "span.d-none.d-sm-inline strong")
+            if commit_span:
+                total = self._parse_count(commit_span.get_text(strip=True))
+
+        # --- Tree Structure ---
+        links = soup.find_all("a", class_="Link--primary")
+        seen_names = set()
+        
+        # Extract repo path for child check
+        repo_path = "/" + "/".join(repo_url.split("/")[-2:]) # /user/repo
+        
+        for link in links:
+            href = link.get("href", "")
+            name = link.get_text(strip=True)
+            
+            if not name or name in seen_names:
+                continue
+            
+            if f"{repo_path}/tree/" in href or f"{repo_path}/blob/" in href:
+                parts = href.strip("/").split("/")
+                if len(parts) >= 5:
+                    seen_names.add(name)
+                    e_type = "tree" if "/tree/" in href else "blob"
+                    tree.append({"name": name, "type": e_type})
+                    if e_type == "blob" and readme_ref is None and name.lower().startswith("readme"):
+                        # /user/repo/blob/<branch>/<file> -> "<branch>/<file>"
+                        readme_ref = httpx.URL(href).path.strip("/").split("/", 3)[3]
+        return tree, total, readme_ref
+
+    def _get_text(self, soup, selector):
+        el = _select_one(soup, selector)
         return el.get_text(strip=True) if el else None
 
-    def _get_href(self, soup, tag, class_name):
-        el = soup.find(tag, class_=class_name)
+    def _get_href(self, soup, selector):
+        el = _select_one(soup, selector)
         return el['href'] if el and 'href' in el.attrs else None
     
     def _parse_count(self, text: str) -> int:
-        text = text.lower().strip().replace(",", "")
-        try:
-            if "k" in text:
-                return int(float(text.replace("k", "")) * 1000)
-            if "m" in text:
-                return int(float(text.replace("m", "")) * 1_000_000)
-            return int(text)
-        except ValueError:
+        match = _RE_COUNT.fullmatch(text.translate(_COUNT_TRANS))
+        if not match:
             return 0
+        return int(float(match.group(1)) * _COUNT_SUFFIX[match.group(2).lower()])
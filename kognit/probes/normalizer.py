@@ -1,5 +1,14 @@
+import io
 from typing import Dict, Any, List
 
+def _commit_history(node: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns defaultBranchRef.target.history, or {} if any link is missing.
+    """
+    ref = node.get("defaultBranchRef") or {}
+    target = ref.get("target") or {}
+    return target.get("history") or {}
+
 def normalize_profile_context(
     github_data: Dict[str, Any], 
     include_readmes: bool = True,
@@ -8,116 +17,125 @@ def normalize_profile_context(
 ) -> str:
     """
     Transforms GitHub GraphQL data into a dense, searchable Markdown context.
+
+    With `include_readmes=False` no README node is ever read, so callers may
+    drop README text from `github_data` before or after normalizing.
     """
-    lines = ["# Developer Digital Footprint\n"]
-    
-    user = github_data.get("data", {}).get("user", {})
+    user = (github_data.get("data") or {}).get("user")
     if not user:
         return "No user data found."
 
+    buf = io.StringIO()
+    w = buf.write
+    w("# Developer Digital Footprint\n\n")
+
     # Identity
-    lines.append(f"## Identity")
-    lines.append(f"Name: {user.get('name')}")
-    lines.append(f"Handle: {user.get('login')}")
-    lines.append(f"Avatar: {user.get('avatarUrl')}")
-    lines.append(f"Bio: {user.get('bio')}")
-    lines.append(f"Company: {user.get('company')}")
-    lines.append(f"Location: {user.get('location')}")
-    lines.append(f"Website: {user.get('websiteUrl')}")
-    lines.append(f"Twitter: {user.get('twitterUsername')}")
-    lines.append(f"Followers: {user.get('followers', {}).get('totalCount')}")
-    contribs = user.get('contributionsCollection', {})
-    calendar = contribs.get('contributionCalendar', {})
-    lines.append(f"Total Contributions (Year): {calendar.get('totalContributions')}")
-    if contribs.get('totalCommitContributions'):
-        lines.append(f" - Commits: {contribs.get('totalCommitContributions')}")
-        lines.append(f" - Pull Requests: {contribs.get('totalPullRequestContributions')}")
-        lines.append(f" - Issues: {contribs.get('totalIssueContributions')}")
-        lines.append(f" - Repos Created: {contribs.get('totalRepositoryContributions')}")
-    lines.append("")
+    contribs = user.get('contributionsCollection') or {}
+    calendar = contribs.get('contributionCalendar') or {}
+    followers = user.get('followers') or {}
+    w(
+        f"## Identity\n"
+        f"Name: {user.get('name')}\n"
+        f"Handle: {user.get('login')}\n"
+        f"Avatar: {user.get('avatarUrl')}\n"
+        f"Bio: {user.get('bio')}\n"
+        f"Company: {user.get('company')}\n"
+        f"Location: {user.get('location')}\n"
+        f"Website: {user.get('websiteUrl')}\n"
+        f"Twitter: {user.get('twitterUsername')}\n"
+        f"Followers: {followers.get('totalCount')}\n"
+        f"Total Contributions (Year): {calendar.get('totalContributions')}\n"
+    )
+    commit_contribs = contribs.get('totalCommitContributions')
+    if commit_contribs:
+        w(
+            f" - Commits: {commit_contribs}\n"
+            f" - Pull Requests: {contribs.get('totalPullRequestContributions')}\n"
+            f" - Issues: {contribs.get('totalIssueContributions')}\n"
+            f" - Repos Created: {contribs.get('totalRepositoryContributions')}\n"
+        )
+    w("\n")
     
     # Pinned Items
-    lines.append("## Pinned Projects (High Signal)")
+    w("## Pinned Projects (High Signal)\n")
     pinned = (user.get("pinnedItems") or {}).get("nodes") or []
     for item in pinned:
         if not item: continue
-        lines.append(f"### {item.get('name')}")
-        lines.append(f"Description: {item.get('description')}")
-        lines.append(f"URL: {item.get('url')}")
+        get = item.get
+        w(f"### {get('name')}\nDescription: {get('description')}\nURL: {get('url')}\n")
         if 'stargazerCount' in item:
-            lines.append(f"Stars: {item.get('stargazerCount')}")
-        if item.get('primaryLanguage'):
-            lines.append(f"Language: {item['primaryLanguage']['name']}")
+            w(f"Stars: {get('stargazerCount')}\n")
+        language = get('primaryLanguage')
+        if language:
+            w(f"Language: {language['name']}\n")
         
         # Structure & Stats
-        history = item.get("defaultBranchRef") or {}
-        if history: history = history.get("target") or {}
-        if history: history = history.get("history") or {}
-        
+        history = _commit_history(item)
         commits = history.get("totalCount", 0)
-        lines.append(f"Total Commits: {commits}")
+        w(f"Total Commits: {commits}\n")
         
         nodes = history.get("nodes") or []
         if nodes:
-            lines.append("Latest Commits:")
+            w("Latest Commits:\n")
             for node in nodes:
                 if node and node.get("message"):
-                    lines.append(f" - {node['message']}")
+                    w(f" - {node['message']}\n")
         
-        tree = (item.get("tree") or {}).get("entries") or []
+        tree = (get("tree") or {}).get("entries") or []
         if tree:
             struct = [f"{e['name']}{'/' if e['type'] == 'tree' else ''}" for e in tree if e]
-            lines.append(f"Repo Structure (Root): {', '.join(struct)}")
+            w(f"Repo Structure (Root): {', '.join(struct)}\n")
 
         # README Content (Truncated)
-        readme = item.get("readme")
-        if include_readmes and readme and isinstance(readme, dict) and readme.get("text"):
-            lines.append("README Snippet:")
-            lines.append(f"```\n{readme.get('text')[:max_readme_chars]}\n```") 
+        if include_readmes:
+            readme = get("readme")
+            text = readme.get("text") if isinstance(readme, dict) else None
+            if text:
+                w(f"README Snippet:\n```\n{text[:max_readme_chars]}\n```\n")
             
-        lines.append("")
+        w("\n")
 
     # Recent/Top Repos
-    lines.append("## Top Repositories (Active & Significant)")
-    lines.append("Note: These repositories are statistically significant. Analyze them for technical depth even if not pinned.")
+    w(
+        "## Top Repositories (Active & Significant)\n"
+        "Note: These repositories are statistically significant. Analyze them for technical depth even if not pinned.\n"
+    )
     repos = (user.get("repositories") or {}).get("nodes") or []
+    repo_readme_chars = max(500, max_readme_chars // 3)
     
     # Limit detailed context to avoid context flooding
-    for i, repo in enumerate(repos[:max_repos]):
+    for repo in repos[:max_repos]:
         if not repo: continue
-        lines.append(f"- **{repo.get('name')}**: {repo.get('description')}")
-        langs_nodes = (repo.get('languages') or {}).get('nodes') or []
-        langs = [l['name'] for l in langs_nodes if l and 'name' in l]
-        lines.append(f"  Stack: {', '.join(langs)}")
-        lines.append(f"  Stars: {repo.get('stargazerCount')} | Updated: {repo.get('pushedAt')}")
-        
-        history = repo.get("defaultBranchRef") or {}
-        if history: history = history.get("target") or {}
-        if history: history = history.get("history") or {}
+        get = repo.get
+        langs = ", ".join(l['name'] for l in (get('languages') or {}).get('nodes') or () if l and 'name' in l)
         
+        history = _commit_history(repo)
         commits = history.get("totalCount", 0)
-        lines.append(f"  Total Commits: {commits}")
+        w(
+            f"- **{get('name')}**: {get('description')}\n"
+            f"  Stack: {langs}\n"
+            f"  Stars: {get('stargazerCount')} | Updated: {get('pushedAt')}\n"
+            f"  Total Commits: {commits}\n"
+        )
         
         nodes = history.get("nodes") or []
         if nodes:
-            lines.append("  Latest Commits:")
+            w("  Latest Commits:\n")
             for node in nodes:
                 if node and node.get("message"):
-                    lines.append(f"   - {node['message']}")
+                    w(f"   - {node['message']}\n")
         
-        tree = (repo.get("tree") or {}).get("entries") or []
+        tree = (get("tree") or {}).get("entries") or []
         if tree:
             struct = [f"{e['name']}{'/' if e['type'] == 'tree' else ''}" for e in tree if e]
-            lines.append(f"  Structure: {', '.join(struct)}")
+            w(f"  Structure: {', '.join(struct)}\n")
 
         # README Snippet for top repos (Smaller than pinned)
         if include_readmes:
-            readme = repo.get("readme")
-            if readme and isinstance(readme, dict) and readme.get("text"):
+            readme = get("readme")
+            text = readme.get("text") if isinstance(readme, dict) else None
+            if text:
                  # Use a smaller fraction of the max limit for unpinned repos
-                 limit = max(500, max_readme_chars // 3)
-                 lines.append(f"  README Extract: {readme.get('text')[:limit]}...")
-             
-    lines.append("")
+                 w(f"  README Extract: {text[:repo_readme_chars]}...\n")
 
-    return "\n".join(lines)
\ No newline at end of file
+    return buf.getvalue()
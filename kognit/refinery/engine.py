@@ -1,6 +1,8 @@
-import os
+import functools
 from typing import Optional, Union
-from pydantic_ai import Agent, RunContext
+from pydantic import ValidationError
+from pydantic_ai import Agent, NativeOutput, RunContext, UnexpectedModelBehavior
+from kognit import aio
 from kognit.models.identity import DeveloperIdentity
 from kognit.probes.normalizer import normalize_profile_context
 from dotenv import load_dotenv
@@ -12,12 +14,18 @@ load_dotenv()
 BASE_PROMPT = """
 You are the Kognit Synthesis Engine. Your goal is to analyze the provided raw data from a developer's GitHub footprint.
 Voice: Professional, objective, and analytical.
+"""
 
+# Only needed when the provider can't constrain its output to the schema and structure comes from a tool call
+TOOL_OUTPUT_INSTRUCTIONS = """
 **CRITICAL INSTRUCTION:**
 You MUST output your response by calling the valid tool/function that matches the `DeveloperIdentity` schema. 
 Do NOT reply with plain markdown text. You must structured your answer inside the function call.
 """
 
+# Providers whose APIs take a JSON schema and decode against it, so output is valid on the first pass
+NATIVE_OUTPUT_PREFIXES = ("google:", "google-gla:", "google-vertex:", "openai:", "openai-responses:")
+
 SUMMARY_INSTRUCTIONS = """
 **Mode: General Summary**
 1. **Focus on Impact:** Explain the 'So What?'.
@@ -43,10 +51,83 @@ CONNECTIONS_INSTRUCTIONS = """
 3. **Output:** MUST populate the `ecosystem_report` field with a detailed analysis of their place in the software world.
 """
 
-# (Agent will be instantiated dynamically in generate_identity_from_context)
+ROAST_TONE = """
+        \n**TONE SETTING: ROAST 🔥**
+        - You are a merciless technical critic.
+        - Roast the developer's tech stack, commit history, and bio.
+        - Be savage, cynical, and technically accurate.
+        - If they use 'trendy' tools, mock them for following hype.
+        - If they use 'old' tools, mock them for being dinosaurs.
+        - Your output should be a scathing critique, not a biography.
+        """
+
+HUMOR_TONE = """
+        \n**TONE SETTING: Humorous (Level {humor}/100)**
+        - Inject wit and technical jokes proportional to the level.
+        - Level 100 is full stand-up comedy.
+        - Level 50 is witty and sarcastic but professional.
+        - Keep the technical facts accurate, but make the delivery entertaining.
+        """
+
+MODE_INSTRUCTIONS = {
+    "summary": SUMMARY_INSTRUCTIONS,
+    "deep-dive": DEEP_DIVE_INSTRUCTIONS,
+    "connections": CONNECTIONS_INSTRUCTIONS,
+}
+
+# (mode, is_roast) -> system prompt, built once at import; unknown modes fall back to summary
+_SYSTEM_PROMPTS = {
+    (mode, roast): f"{BASE_PROMPT}\n\n{instructions}" + (ROAST_TONE if roast else "")
+    for mode, instructions in MODE_INSTRUCTIONS.items()
+    for roast in (False, True)
+}
+
+DEFAULT_MODEL = 'google-gla:gemini-flash-latest'
 
 from kognit.refinery.validator import refine_identity
 
+def _supports_native_output(model_name: str) -> bool:
+    return model_name.startswith(NATIVE_OUTPUT_PREFIXES)
+
+@functools.lru_cache(maxsize=32)
+def _build_synthesis_agent(model_name: str, system_prompt: str) -> Agent:
+    """
+    Builds (once per model/prompt combination) the synthesis Agent, so its DeveloperIdentity
+    output schema is generated once rather than on every call.
+    Uses the provider's native structured output where available, else PydanticAI's tool-call output.
+    """
+    if _supports_native_output(model_name):
+        return Agent(
+            model_name,
+            output_type=NativeOutput(DeveloperIdentity),
+            system_prompt=system_prompt
+        )
+    return Agent(
+        model_name,
+        output_type=DeveloperIdentity,
+        system_prompt=f"{system_prompt}\n{TOOL_OUTPUT_INSTRUCTIONS}"
+    )
+
+async def _run_streamed(agent: Agent, prompt: str) -> DeveloperIdentity:
+    """
+    Streams the structured output, reporting each field as soon as the model moves past it.
+    Any error leaves the stream context, which closes the response instead of waiting out the generation.
+    run_stream() can't hand validation errors back to the model, so invalid output falls back to a plain run.
+    """
+    try:
+        async with agent.run_stream(prompt) as result:
+            reported = 0
+            async for partial in result.stream_output(debounce_by=0.05):
+                # Fields arrive in schema order; all but the last one present are complete
+                filled = [name for name in DeveloperIdentity.model_fields if name in partial.model_fields_set]
+                for name in filled[reported:-1]:
+                    print(f"  > [Synthesis] {name} ready")
+                reported = max(reported, len(filled) - 1)
+            return await result.get_output()
+    except (UnexpectedModelBehavior, ValidationError):
+        print("  > [Synthesis] Streamed output failed validation, retrying without streaming...")
+        return (await agent.run(prompt)).output
+
 def generate_identity_from_context(
     context_str: str, 
     model_name: Optional[str] = None,
@@ -59,46 +140,16 @@ def generate_identity_from_context(
     Directly synthesizes identity from a pre-normalized context string with specific mode instructions.
     """
     
-    # Select Mode Instructions
-    if mode == "deep-dive":
-        mode_prompt = DEEP_DIVE_INSTRUCTIONS
-    elif mode == "connections":
-        mode_prompt = CONNECTIONS_INSTRUCTIONS
-    else:
-        mode_prompt = SUMMARY_INSTRUCTIONS
-
-    # Construct Full Prompt
-    full_system_prompt = f"{BASE_PROMPT}\n\n{mode_prompt}"
-    
-    # Inject Tone
-    if is_roast:
-        full_system_prompt += """
-        \n**TONE SETTING: ROAST 🔥**
-        - You are a merciless technical critic.
-        - Roast the developer's tech stack, commit history, and bio.
-        - Be savage, cynical, and technically accurate.
-        - If they use 'trendy' tools, mock them for following hype.
-        - If they use 'old' tools, mock them for being dinosaurs.
-        - Your output should be a scathing critique, not a biography.
-        """
-    elif humor_level > 0:
-        full_system_prompt += f"""
-        \n**TONE SETTING: Humorous (Level {humor_level}/100)**
-        - Inject wit and technical jokes proportional to the level.
-        - Level 100 is full stand-up comedy.
-        - Level 50 is witty and sarcastic but professional.
-        - Keep the technical facts accurate, but make the delivery entertaining.
-        """
+    # Only the humor level and custom instructions vary beyond the precomputed mode/tone prompts
+    full_system_prompt = _SYSTEM_PROMPTS.get((mode, is_roast)) or _SYSTEM_PROMPTS[("summary", is_roast)]
+    if humor_level > 0 and not is_roast:
+        full_system_prompt += HUMOR_TONE.format(humor=humor_level)
     
     if custom_instructions:
         full_system_prompt += f"\n\n**User Custom Instructions:**\n{custom_instructions}"
 
-    # Optimization: Re-instantiate agent to set system prompt cleanly
-    agent = Agent(
-        model_name or 'google-gla:gemini-flash-latest',
-        output_type=DeveloperIdentity,
-        system_prompt=full_system_prompt
-    )
+    # Prompts are assembled from a handful of modes and tones, so agents are reused across calls
+    agent = _build_synthesis_agent(model_name or DEFAULT_MODEL, full_system_prompt)
     
     import time
     max_retries = 3
@@ -106,11 +157,11 @@ def generate_identity_from_context(
 
     for attempt in range(max_retries):
         try:
-            result = agent.run_sync(
-                f"Analyze the following developer footprint:\n\n{context_str}"
-            )
+            output = aio.run(_run_streamed(
+                agent, f"Analyze the following developer footprint:\n\n{context_str}"
+            ))
             # --- Integration: Validate and Refine ---
-            identity = refine_identity(result.output, context_str)
+            identity = refine_identity(output, context_str)
             break # Success!
         except Exception as e:
             error_str = str(e).lower()
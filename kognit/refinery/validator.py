@@ -1,35 +1,128 @@
+import os
+import time
+import logging
+import asyncio
+import importlib.util
+from collections import defaultdict
 import httpx
-from typing import List, Set
+from typing import Dict, List, Optional, Set, Tuple
+from kognit import aio
 from kognit.models.identity import DeveloperIdentity
 
+log = logging.getLogger(__name__)
+
+# Upper bound on simultaneous probes; every link is otherwise checked at once
+MAX_CONCURRENT_CHECKS = 20
+# Links on one host share its connection and stay under its rate limiter
+PER_HOST_CONCURRENCY = 4
+# With h2 installed, each host's probes are multiplexed over one TLS connection
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# A live page answers a HEAD well within a second; override for slow networks
+LINK_VALIDATION_TIMEOUT = float(os.getenv("LINK_VALIDATION_TIMEOUT_SECONDS", "1.0"))
+# Cap on the whole validation pass. Links still unresolved then are kept: slow isn't the same as dead
+LINK_VALIDATION_DEADLINE = 3.0
+# Statuses some servers return for HEAD alone; only these are re-checked with a GET
+HEAD_UNRELIABLE_STATUSES = (403, 405, 501)
+
+# Hosts whose root and profile pages (at most one path segment) are taken as reachable without a probe.
+# Deeper links (repos, posts, papers) are still checked: that is where made-up URLs show up
+TRUSTED_HOSTS = frozenset({
+    "github.com", "linkedin.com", "www.linkedin.com", "twitter.com", "x.com",
+    "arxiv.org", "medium.com", "dev.to", "stackoverflow.com"
+})
+
+# link -> (checked at, reachable). Popular links (github.com, personal sites) recur across identities
+LINK_CACHE_TTL = 3600
+LINK_CACHE_MAX = 10_000
+_link_cache: Dict[str, Tuple[float, bool]] = {}
+
 def validate_links(identity: DeveloperIdentity, raw_source: str) -> List[str]:
     """
     Checks if all external_links in the identity are reachable via HTTP.
-    Returns a list of invalid links (404s or unreachable).
+    Returns a list of invalid links (4xx/5xx or hosts that can't be connected to); slow hosts are given the benefit of the doubt.
     """
-    invalid_links = []
-    
-    with httpx.Client(timeout=3.0, follow_redirects=True) as client:
-        for link in identity.external_links:
-            try:
-                # 1. Simple format check
-                if not link.startswith("http"):
-                    invalid_links.append(link)
-                    continue
-
-                # 2. Reachability check
-                resp = client.head(link)
-                # HEAD sometimes rejected, fallback to GET if needed, but 405 Method Not Allowed means it exists
-                if resp.status_code >= 400 and resp.status_code != 405:
-                    # Retry with GET just to be sure
-                    get_resp = client.get(link)
-                    if get_resp.status_code >= 400:
-                        invalid_links.append(link)
-            except Exception:
-                # DNS error, timeout, etc.
-                invalid_links.append(link)
-
-    return invalid_links
+    links = identity.external_links
+    if not links:
+        return []
+    invalid = aio.run(_find_unreachable(set(links)))
+    return [link for link in links if link in invalid]
+
+async def _find_unreachable(links: Set[str]) -> Set[str]:
+    """
+    Probes all `links` concurrently, for at most LINK_VALIDATION_DEADLINE seconds in total.
+    """
+    # Simple format check
+    invalid = {link for link in links if not link.startswith("http")}
+
+    now = time.monotonic()
+    candidates = []
+    for link in links - invalid:
+        if _is_trusted(link):
+            continue
+        checked_at, ok = _link_cache.get(link, (0.0, None))
+        if ok is None or now - checked_at >= LINK_CACHE_TTL:
+            candidates.append(link)
+        elif not ok:
+            invalid.add(link)
+    if not candidates:
+        return invalid
+
+    host_sems = defaultdict(lambda: asyncio.Semaphore(PER_HOST_CONCURRENCY))
+    limits = httpx.Limits(max_connections=MAX_CONCURRENT_CHECKS, max_keepalive_connections=MAX_CONCURRENT_CHECKS)
+    async with httpx.AsyncClient(
+        timeout=LINK_VALIDATION_TIMEOUT, follow_redirects=True, limits=limits, http2=HTTP2_AVAILABLE
+    ) as client:
+        probes = {
+            asyncio.ensure_future(_is_reachable(client, link, host_sems[_netloc(link)])): link
+            for link in candidates
+        }
+        done, pending = await asyncio.wait(probes, timeout=LINK_VALIDATION_DEADLINE)
+        for task in pending:
+            task.cancel()
+        # Let cancellations unwind before the client closes
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    now = time.monotonic()
+    for task in done:
+        link, ok = probes[task], task.result()
+        if ok is None:
+            continue # Unknown, like a probe still pending at the deadline: keep it and ask again next time
+        _link_cache.pop(link, None) # Re-insert so dict order stays oldest-first
+        _link_cache[link] = (now, ok)
+        if not ok:
+            invalid.add(link)
+    while len(_link_cache) > LINK_CACHE_MAX:
+        del _link_cache[next(iter(_link_cache))]
+    return invalid
+
+def _netloc(link: str) -> str:
+    # Plain string split: malformed links must still reach _is_reachable to be reported
+    return link.partition("//")[2].partition("/")[0].lower()
+
+def _is_trusted(link: str) -> bool:
+    path = link.partition("//")[2].partition("/")[2].split("?", 1)[0].split("#", 1)[0].strip("/")
+    return _netloc(link) in TRUSTED_HOSTS and "/" not in path
+
+async def _is_reachable(client: httpx.AsyncClient, link: str, host_sem: asyncio.Semaphore) -> Optional[bool]:
+    """
+    True/False for a definitive answer, None when the host accepted the connection but was too slow or dropped it.
+    """
+    try:
+        async with host_sem:
+            resp = await client.head(link)
+            if resp.status_code in HEAD_UNRELIABLE_STATUSES:
+                # Confirm with a GET, but only read the status line; the body is never downloaded
+                async with client.stream("GET", link) as get_resp:
+                    return get_resp.status_code < 400
+            return resp.status_code < 400
+    except httpx.ConnectError:
+        # Unresolvable host, refused connection or failed TLS handshake
+        return False
+    except (httpx.TimeoutException, httpx.ReadError, httpx.RemoteProtocolError):
+        return None
+    except Exception:
+        # Malformed URL, unsupported scheme, etc.
+        return False
 
 def cross_check_metrics(identity: DeveloperIdentity, raw_source: str) -> List[str]:
     """
@@ -43,7 +136,7 @@ def refine_identity(identity: DeveloperIdentity, raw_source: str) -> DeveloperId
     """
     invalid_links = validate_links(identity, raw_source)
     if invalid_links:
-        print(f"  [Validator] Removing invalid/unreachable links: {invalid_links}")
+        log.info("[Validator] Removing invalid/unreachable links: %s", invalid_links)
         identity.external_links = [l for l in identity.external_links if l not in invalid_links]
     
     return identity
\ No newline at end of file
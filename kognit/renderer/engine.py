@@ -1,125 +1,149 @@
 import os
 import re
-import markdown
-import matplotlib.pyplot as plt
+from markdown_it import MarkdownIt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_svg import FigureCanvasSVG
 import io
-from jinja2 import Environment, FileSystemLoader
+import functools
+import secrets
+import threading
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
 from kognit.renderer.manifest import RenderManifest
 
-def render_to_html(manifest: RenderManifest, output_path: str):
+JINJA_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "kognit", "jinja")
+
+class _LazyBytecodeCache(FileSystemBytecodeCache):
     """
-    Renders the manifest to an HTML file, converting Markdown fields to HTML.
+    On-disk template bytecode, so a fresh process (CLI run, render worker) loads instead of recompiling.
+    The directory is only created on the first write; if that fails rendering just stays uncached.
     """
-    identity = manifest.identity
-    
-    def latex_to_svg(latex_str, fontsize=12):
-        """
-        Renders a LaTeX string to an SVG using Matplotlib.
-        """
+    def dump_bytecode(self, bucket):
         try:
-            # Create a dummy figure
-            fig = plt.figure(figsize=(0.01, 0.01))
-            # Render text. We use raw strings. 
-            # Matplotlib requires $...$ for math mode.
-            # If the input doesn't have $, we wrap it.
-            if not latex_str.startswith('$'):
-                latex_str = f"${latex_str}$"
-                
-            text = fig.text(0.5, 0.5, latex_str, fontsize=fontsize, ha='center', va='center')
-            
-            # Save to buffer
-            buf = io.BytesIO()
-            fig.savefig(buf, format='svg', bbox_inches='tight', pad_inches=0.05, transparent=True)
-            plt.close(fig)
-            
-            svg_data = buf.getvalue().decode('utf-8')
-            
-            # Matplotlib SVG includes a lot of XML headers, we strip them to inline it
-            # Start from <svg
-            start_idx = svg_data.find('<svg')
-            if start_idx != -1:
-                svg_data = svg_data[start_idx:]
-                
-            return svg_data
-        except Exception as e:
-            print(f"LaTeX Rendering Error: {e}")
-            plt.close(fig)
-            return f"<code>{latex_str}</code>" # Fallback
-
-    def process_math(text):
-        if not text: return ""
-        
-        # Function to replace block math $$...$$
-        def replace_block(match):
-            latex = match.group(1)
-            svg = latex_to_svg(latex, fontsize=14)
-            return f'<div class="math-block" style="text-align: center; margin: 15px 0;">{svg}</div>'
-
-        # Function to replace inline math $...$
-        def replace_inline(match):
-            latex = match.group(1)
-            svg = latex_to_svg(latex, fontsize=10)
-            return f'<span class="math-inline" style="vertical-align: middle;">{svg}</span>'
-
-        # Process Block Math first
-        text = re.sub(r'\$\$([\s\S]+?)\$\$', replace_block, text)
+            os.makedirs(self.directory, exist_ok=True)
+            super().dump_bytecode(bucket)
+        except OSError as e:
+            print(f"  > Warning: Could not write template cache: {e}")
+
+# Built once so Jinja's compiled-template cache survives across renders; templates ship with the package
+_ENV = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), 'templates')),
+    auto_reload=False,
+    bytecode_cache=_LazyBytecodeCache(JINJA_CACHE_DIR)
+)
+
+# $$block$$ or $inline$ math; the block alternative is tried first at each position
+_MATH_RE = re.compile(r'\$\$([\s\S]+?)\$\$|\$([^$]+?)\$')
+_MATH_TOKEN_RE = re.compile(r'<p>(KOGNITBLOCK[0-9a-f]{16}x\d+Z)</p>|(KOGNIT(?:BLOCK|INLINE)[0-9a-f]{16}x\d+Z)')
+
+# One figure reused for every formula; clearing it is much cheaper than building a new one.
+# The lock serializes renders, since a Figure isn't safe to share between threads.
+_FIG = Figure(figsize=(0.01, 0.01))
+FigureCanvasSVG(_FIG) # attaches itself as _FIG.canvas, so savefig needs no backend switch
+_FIG_LOCK = threading.Lock()
+
+@functools.lru_cache(maxsize=1024)
+def latex_to_svg(latex_str, fontsize=12):
+    """
+    Renders a LaTeX string to an SVG using Matplotlib's mathtext.
+    Draws on the shared _FIG instead of pyplot, so no global figure registry is involved.
+    Memoized on (latex_str, fontsize): reports repeat the same few symbols and each render builds a figure.
+    """
+    # Matplotlib requires $...$ for math mode.
+    # If the input doesn't have $, we wrap it.
+    if not latex_str.startswith('$'):
+        latex_str = f"${latex_str}$"
+    try:
+        buf = io.BytesIO()
+        with _FIG_LOCK:
+            _FIG.clf()
+            _FIG.text(0.5, 0.5, latex_str, fontsize=fontsize, ha='center', va='center')
+            _FIG.savefig(buf, format='svg', bbox_inches='tight', pad_inches=0.05, transparent=True)
         
-        # Process Inline Math (non-greedy)
-        text = re.sub(r'\$([^$]+?)\$', replace_inline, text)
+        svg_data = buf.getvalue().decode('utf-8')
         
-        return text
-
-    # Helper to safely convert
-    def md(text):
-        if not text: return ""
-        # 1. Process Math -> SVG
-        text_with_math = process_math(text)
-        # 2. Markdown -> HTML
-        return markdown.markdown(text_with_math, extensions=['extra'])
-
-    # Process repository analyses markdown if present
-    processed_repos = []
-    if identity.repository_analyses:
-        for repo in identity.repository_analyses:
-            # We clone/copy to avoid mutating original
-            processed_repos.append({
-                "name": repo.name,
-                "summary": repo.summary,
-                "technical_deconstruction": md(repo.technical_deconstruction),
-                "key_technologies": repo.key_technologies,
-                "complexity_score": repo.complexity_score
-            })
-
-    processed_identity = {
-        "name": identity.name,
-        "avatar_url": identity.avatar_url,
-        "headline": identity.headline,
+        # Matplotlib SVG includes a lot of XML headers, we strip them to inline it
+        # Start from <svg
+        start_idx = svg_data.find('<svg')
+        if start_idx != -1:
+            svg_data = svg_data[start_idx:]
+            
+        return svg_data
+    except Exception as e:
+        print(f"LaTeX Rendering Error: {e}")
+        return f"<code>{latex_str}</code>" # Fallback
+
+def _replace_math(match):
+    block, inline = match.groups()
+    if block is not None:
+        svg = latex_to_svg(block, fontsize=14)
+        return f'<div class="math-block" style="text-align: center; margin: 15px 0;">{svg}</div>'
+    svg = latex_to_svg(inline, fontsize=10)
+    return f'<span class="math-inline" style="vertical-align: middle;">{svg}</span>'
+
+def process_math(text):
+    """
+    Swaps each formula for an alphanumeric placeholder that Markdown leaves alone.
+    Returns (text, {placeholder: rendered formula}); `restore_math` puts them back after conversion.
+    Placeholders carry a per-call nonce, so look-alikes already in the text are never substituted.
+    """
+    if not text: return "", {}
+    fragments = {}
+    nonce = secrets.token_hex(8)
+
+    def stash(match):
+        kind = "BLOCK" if match.group(1) is not None else "INLINE"
+        token = f"KOGNIT{kind}{nonce}x{len(fragments)}Z"
+        fragments[token] = _replace_math(match)
+        return token
+
+    # Block and inline math in a single pass
+    return _MATH_RE.sub(stash, text), fragments
+
+def restore_math(html, fragments):
+    if not fragments: return html
+    # A block formula on its own line comes back as a bare paragraph; drop the <p> around its <div>
+    return _MATH_TOKEN_RE.sub(lambda m: fragments.get(m.group(1) or m.group(2), m.group(0)), html)
+
+def md(text):
+    """
+    Markdown (with $math$) -> HTML. Safe for None/empty fields.
+    """
+    if not text: return ""
+    return _md_cached(text)
+
+# CommonMark with raw HTML passthrough, plus the GFM tables and strikethrough LLM reports use
+_MARKDOWN = MarkdownIt("commonmark").enable(["table", "strikethrough"])
+
+@functools.lru_cache(maxsize=512)
+def _md_cached(text):
+    # Keyed on the raw field, so re-rendering an unchanged report (e.g. another theme) skips both passes
+    # 1. Process Math -> SVG (held aside so the parser never scans the SVG markup)
+    text_with_math, fragments = process_math(text)
+    # 2. Markdown -> HTML
+    return restore_math(_MARKDOWN.render(text_with_math), fragments)
+
+def render_to_html(manifest: RenderManifest, output_path: str):
+    """
+    Renders the manifest to an HTML file, converting Markdown fields to HTML.
+    """
+    identity = manifest.identity
+
+    # Copies that only overlay the Markdown fields; Jinja reads everything else straight off the models
+    processed_identity = identity.model_copy(update={
         "summary": md(identity.summary),
-        "technical_dna": identity.technical_dna,
-        "project_highlights": identity.project_highlights, 
-        "role_inference": identity.role_inference,
-        "external_links": identity.external_links,
         "technical_depth_report": md(identity.technical_depth_report),
         "ecosystem_report": md(identity.ecosystem_report),
-        "repository_analyses": processed_repos
-    }
-    
-    template_dir = os.path.join(os.path.dirname(__file__), 'templates')
-    env = Environment(loader=FileSystemLoader(template_dir))
-    template = env.get_template('biography.html')
-    
-    render_context = {
-        "manifest": {
-            "identity": processed_identity,
-            "theme": manifest.theme,
-            "typography": manifest.typography,
-            "assets": manifest.assets
-        }
-    }
+        "repository_analyses": [
+            repo.model_copy(update={"technical_deconstruction": md(repo.technical_deconstruction)})
+            for repo in identity.repository_analyses or ()
+        ]
+    })
     
-    html_content = template.render(**render_context)
+    template = _ENV.get_template('biography.html')
+    render_context = {"manifest": manifest.model_copy(update={"identity": processed_identity})}
     
+    # Written chunk by chunk as the template renders; the full document never exists as one string
     with open(output_path, 'w') as f:
-        f.write(html_content)
+        template.stream(**render_context).dump(f)
     
     return output_path
\ No newline at end of file
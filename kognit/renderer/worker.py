@@ -0,0 +1,50 @@
+import os
+import sys
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+
+console = Console()
+
+# Directory containing the `kognit` package, so the child can import it from any cwd
+_PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def generate_preview_image(pdf_bytes: bytes, png_path: str):
+    """
+    Generates a PNG preview from a PDF holding only the report's first page.
+    """
+    from pdf2image import convert_from_bytes
+    try:
+        images = convert_from_bytes(pdf_bytes, first_page=1, last_page=1)
+        if images:
+            images[0].save(png_path, "PNG")
+            console.print(f"[bold green]Preview Generated: {png_path}[/bold green]")
+    except Exception as e:
+        console.print(f"[yellow]Could not generate PNG preview: {e}[/yellow]")
+
+def render_pdf_and_preview(html_path: str, pdf_path: str):
+    """
+    Renders the HTML report to PDF and writes a PNG preview of its first page.
+    """
+    from weasyprint import HTML
+    document = HTML(html_path).render()
+    # Poppler only needs page 1: rasterize a one-page PDF in the
+    # background while the full document is written out
+    first_page_pdf = document.copy([document.pages[0]]).write_pdf()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        preview = pool.submit(generate_preview_image, first_page_pdf, pdf_path.replace(".pdf", ".png"))
+        document.write_pdf(pdf_path)
+        console.print(f"[bold green]PDF Generated: {pdf_path}[/bold green]")
+        preview.result()
+
+def spawn(html_path: str, pdf_path: str) -> subprocess.Popen:
+    """
+    Starts rendering in a separate interpreter that only imports this module.
+    Cairo/Poppler memory is returned to the OS when it exits, and a stuck render can be killed.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (_PACKAGE_ROOT, env.get("PYTHONPATH")) if p)
+    return subprocess.Popen([sys.executable, "-m", "kognit.renderer.worker", html_path, pdf_path], env=env)
+
+if __name__ == "__main__":
+    render_pdf_and_preview(sys.argv[1], sys.argv[2])
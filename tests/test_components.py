@@ -1,7 +1,19 @@
+import asyncio
+import socket
+import httpx
 import pytest
+from pydantic_ai.exceptions import ModelHTTPError
 from kognit.probes.normalizer import normalize_profile_context
+from kognit.refinery import validator
 from kognit.refinery.validator import validate_links
 from kognit.models.identity import DeveloperIdentity, TechnicalDNA, ExternalFootprint
+from kognit.models.analysis import RepoAnalysis
+from kognit.agent import cache
+from kognit.agent.explorer import ExplorerAgent, AbortDive, _classify
+from kognit.metrics import NullMetrics
+from kognit.renderer import engine
+from kognit.probes.github import GithubProbe
+from kognit.cache import readme as readme_cache
 
 def test_normalizer_structure():
     mock_github = {
@@ -21,16 +33,235 @@ def test_normalizer_structure():
     assert "Test User" in context
     assert "## Identity" in context
 
-def test_validator_reachability():
-    identity = DeveloperIdentity(
+def _route_httpx(monkeypatch, handler):
+    """
+    Answers every httpx.AsyncClient request with `handler` instead of the network.
+    """
+    real_init = httpx.AsyncClient.__init__
+    def init(self, *args, **kwargs):
+        kwargs.pop("http2", None)
+        kwargs["transport"] = httpx.MockTransport(handler)
+        real_init(self, *args, **kwargs)
+    monkeypatch.setattr(httpx.AsyncClient, "__init__", init)
+
+def _mock_link_probes(monkeypatch, handler):
+    """
+    Routes the validator's HTTP client through `handler` with a fresh link cache; returns the requested URLs.
+    """
+    requested = []
+    async def record(request):
+        requested.append(str(request.url))
+        return await handler(request)
+    _route_httpx(monkeypatch, record)
+    monkeypatch.setattr(validator, "_link_cache", {})
+    return requested
+
+def _identity_with_links(*links):
+    return DeveloperIdentity(
         name="Test", headline="Test", summary="Test",
         technical_dna=TechnicalDNA(specialization="Test"),
         external_footprint=ExternalFootprint(writing_style="Test"),
-        external_links=["https://github.com", "https://invalid-link-12345.com"]
+        external_links=list(links)
+    )
+
+async def _dead_or_alive(request):
+    if request.url.host == "invalid-link-12345.com":
+        raise httpx.ConnectError("Name or service not known", request=request) from socket.gaierror(-2, "Name or service not known")
+    return httpx.Response(404 if request.url.path.endswith("/gone") else 200)
+
+def test_validator_reachability(monkeypatch):
+    _mock_link_probes(monkeypatch, _dead_or_alive)
+    invalid = validate_links(_identity_with_links(
+        "https://example.com/live", "https://example.com/gone", "https://invalid-link-12345.com"
+    ), "")
+    assert invalid == ["https://example.com/gone", "https://invalid-link-12345.com"]
+
+def test_validator_removes_refused_connections(monkeypatch):
+    async def refused(request):
+        if request.url.host == "closed.example.com":
+            raise httpx.ConnectError("[Errno 111] Connection refused", request=request)
+        return httpx.Response(200)
+    _mock_link_probes(monkeypatch, refused)
+    invalid = validate_links(_identity_with_links("https://closed.example.com/app", "https://example.com/live"), "")
+    assert invalid == ["https://closed.example.com/app"]
+
+def test_validator_trusted_hosts(monkeypatch):
+    requested = _mock_link_probes(monkeypatch, _dead_or_alive)
+    invalid = validate_links(_identity_with_links(
+        "https://github.com", "https://github.com/testuser", "https://github.com/testuser/gone"
+    ), "")
+    # Root and profile pages are trusted; a repo path is where invented links show up
+    assert requested == ["https://github.com/testuser/gone"]
+    assert invalid == ["https://github.com/testuser/gone"]
+
+def test_validator_cache_reused_within_ttl(monkeypatch):
+    requested = _mock_link_probes(monkeypatch, _dead_or_alive)
+    identity = _identity_with_links("https://example.com/live", "https://example.com/gone")
+    assert validate_links(identity, "") == ["https://example.com/gone"]
+    assert validate_links(identity, "") == ["https://example.com/gone"]
+    assert len(requested) == 2
+    monkeypatch.setattr(validator, "LINK_CACHE_TTL", 0)
+    validate_links(identity, "")
+    assert len(requested) == 4
+
+def test_validator_keeps_slow_links(monkeypatch):
+    async def slow(request):
+        if request.url.host == "slow.example.com":
+            await asyncio.sleep(5)
+        if request.url.host == "timeout.example.com":
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(404)
+    _mock_link_probes(monkeypatch, slow)
+    monkeypatch.setattr(validator, "LINK_VALIDATION_DEADLINE", 0.1)
+    invalid = validate_links(_identity_with_links(
+        "https://slow.example.com/a", "https://timeout.example.com/b", "https://example.com/gone"
+    ), "")
+    # Pending at the deadline or timed out is unknown, not dead, and isn't cached either
+    assert invalid == ["https://example.com/gone"]
+    assert list(validator._link_cache) == ["https://example.com/gone"]
+
+def test_analysis_cache_roundtrip(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    analysis = RepoAnalysis(name="repo", summary="s", key_technologies=["Rust"], complexity_score=7)
+    assert cache.get("abc") is None
+    cache.set("abc", analysis)
+    assert cache.get("abc") == analysis
+    assert cache.get("abc", ttl=-1) is None
+
+def test_compile_report_orders_by_complexity():
+    agent = ExplorerAgent.__new__(ExplorerAgent) # No LLM needed to compile a report
+    report = agent._compile_report([
+        RepoAnalysis(name="simple", summary="s", complexity_score=2),
+        RepoAnalysis(name="hard", summary="s", key_technologies=["C", "CUDA"], complexity_score=9),
+    ])
+    text = report["consolidated_report"]
+    assert text.index("## hard (Complexity: 9/10)") < text.index("## simple (Complexity: 2/10)")
+    assert "**Tech Stack:** C, CUDA" in text
+    assert [a.name for a in report["analyses"]] == ["simple", "hard"]
+
+def test_classify_uses_status_code():
+    assert _classify(ModelHTTPError(401, "m", {"error": "bad key"})) == "terminal"
+    assert _classify(ModelHTTPError(429, "m")) == "transient"
+    # A context-length error must not be mistaken for a 403 by its token counts
+    too_long = ModelHTTPError(400, "m", {"error": "prompt is 140300 tokens, max is 1403 tokens"})
+    assert _classify(too_long) == "recoverable"
+    assert _classify(ValueError("prompt is 140300 tokens")) == "recoverable"
+    assert _classify(ValueError("HTTP 403 Forbidden")) == "terminal"
+
+def test_full_dive_aborts_and_cancels_queued():
+    agent = ExplorerAgent.__new__(ExplorerAgent) # No LLM needed, analyses are stubbed
+    agent.concurrency = 2
+    agent.metrics = NullMetrics()
+    started, cancelled = [], []
+
+    async def analyze(repo):
+        started.append(repo["name"])
+        if repo["name"] == "bad":
+            await asyncio.sleep(0.01)
+            raise AbortDive("invalid api key")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(repo["name"])
+            raise
+    agent.analyze_repository = analyze
+
+    repos = [{"name": n} for n in ("bad", "slow", "queued")]
+    with pytest.raises(AbortDive):
+        asyncio.run(agent.full_dive({"repositories": {"nodes": repos}}))
+    assert started == ["bad", "slow"]
+    assert cancelled == ["slow"]
+
+def test_markdown_math_roundtrip(monkeypatch):
+    monkeypatch.setattr(engine, "latex_to_svg", lambda latex, fontsize=12: f"<svg>{latex}</svg>")
+    engine._md_cached.cache_clear()
+    html = engine.md(
+        "Runs in $O(n)$ time.\n\n"
+        "$$E = mc^2$$\n\n"
+        "| Op | Cost |\n|----|------|\n| sort | $n \\log n$ |\n"
+    )
+    engine._md_cached.cache_clear()
+    assert '<p>Runs in <span class="math-inline" style="vertical-align: middle;"><svg>O(n)</svg></span> time.</p>' in html
+    # The block formula's paragraph is dropped around its <div>
+    assert '\n<div class="math-block" style="text-align: center; margin: 15px 0;"><svg>E = mc^2</svg></div>\n' in html
+    assert "<p><div" not in html
+    assert '<td><span class="math-inline" style="vertical-align: middle;"><svg>n \\log n</svg></span></td>' in html
+    assert "KOGNIT" not in html
+    # Placeholder look-alikes in the input (e.g. echoed by a model) are left as text
+    assert engine.md("See KOGNITINLINE7Z and $x$").startswith("<p>See KOGNITINLINE7Z and <span")
+    engine._md_cached.cache_clear()
+
+def _run_probe(monkeypatch, handler, call, token=None):
+    """
+    Awaits `call(probe, client)` on a GithubProbe whose requests are answered by `handler`.
+    """
+    _route_httpx(monkeypatch, handler)
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    probe = GithubProbe(token=token)
+    async def run():
+        async with probe:
+            return await call(probe, probe._ensure_client())
+    return asyncio.run(run())
+
+def test_parse_count():
+    probe = GithubProbe.__new__(GithubProbe) # Pure parsing, no client needed
+    assert probe._parse_count("1.2k") == 1200
+    assert probe._parse_count("3M") == 3_000_000
+    assert probe._parse_count(" 1,234 ") == 1234
+    assert probe._parse_count("\u2014") == 0
+    assert probe._parse_count("") == 0
+
+def test_parse_repo_listing():
+    card = """<li class="col-12" itemprop="owns"><div>
+<a href="/testuser/{name}" itemprop="name codeRepository">
+  {name}</a>
+<ul class="topics"><li>rust</li><li>cli</li></ul>
+<p class="col-9" itemprop="description">About {name}</p>
+<span itemprop="programmingLanguage">Rust</span>
+<a class="Link--muted" href="/testuser/{name}/stargazers">1.2k</a>
+<relative-time datetime="2024-01-02T00:00:00Z">Jan 2</relative-time>
+</div></li>"""
+    pages = [
+        httpx.Response(200, text="<html><body><ul>" + card.format(name="alpha") + card.format(name="beta") + "</ul></body></html>"),
+        httpx.Response(200, text="<html><body></body></html>"),
+        httpx.ConnectError("page 3 failed")
+    ]
+    repos = GithubProbe.__new__(GithubProbe)._parse_repo_listing(pages)
+    assert [r.name for r in repos] == ["alpha", "beta"]
+    # Fields after the nested topic list must survive
+    beta = repos[1]
+    assert (beta.url, beta.desc, beta.lang, beta.stars, beta.pushed) == (
+        "https://github.com/testuser/beta", "About beta", "Rust", 1200, "2024-01-02T00:00:00Z"
+    )
+
+def test_readme_etag_revalidation(monkeypatch, tmp_path):
+    monkeypatch.setattr(readme_cache, "CACHE_DIR", str(tmp_path))
+    seen = []
+    def handler(request):
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="# Hello", headers={"ETag": '"v1"'})
+    fetch = lambda probe, client: probe._fetch_readme(client, "testuser", "repo", "main/README.md")
+    assert _run_probe(monkeypatch, handler, fetch) == "# Hello"
+    # The second run sends the stored ETag and serves the cached text from a bodiless 304
+    assert _run_probe(monkeypatch, handler, fetch) == "# Hello"
+    assert seen == [None, '"v1"']
+
+def test_commit_count_from_link_header(monkeypatch):
+    commits_api = "https://api.github.com/repos/testuser/repo/commits"
+    def handler(request):
+        assert str(request.url).startswith(commits_api)
+        if request.url.params["per_page"] == "1":
+            return httpx.Response(200, json=[{"commit": {"message": "latest"}}], headers={
+                "Link": f'<{commits_api}?per_page=1&page=2>; rel="next", <{commits_api}?per_page=1&page=137>; rel="last"'
+            })
+        return httpx.Response(200, json=[{"commit": {"message": f"commit {i}\n\nbody"}} for i in range(4)])
+    total, messages = _run_probe(
+        monkeypatch, handler, lambda probe, client: probe._fetch_commits(client, "testuser", "repo"), token="test-token"
     )
-    invalid = validate_links(identity, "")
-    assert "https://invalid-link-12345.com" in invalid
-    assert "https://github.com" not in invalid
+    assert total == 137
+    assert messages == ["commit 0", "commit 1", "commit 2", "commit 3"]
 
 if __name__ == "__main__":
     # Manual run if needed